@@ -0,0 +1,135 @@
+"""
+This file is a module for the game Automaze. It moves many agents (chasers, which head for the player, and wanderers, which roam at random) around a level at once. Rather than every agent searching for its own path, a single flow field (the minimum number of steps from the player's cell to every cell) is computed once per player step, and every agent then moves to its neighboring cell with the lowest distance; agent positions are numpy arrays and all agents move in one vectorized step, so hundreds of agents cost about the same as one. It is imported into the Automaze main.py module and references the config.py and maze_features.py modules.
+"""
+
+from config import *
+from maze_features import STEPS, distance_fields
+
+import numpy as np
+
+# An agent may stay on its cell or take any of the 8 steps a player can take
+MOVES = np.array([(0, 0)] + STEPS)
+
+class Agents():
+    """
+    The agents of one level array. The flow field is padded with a border of UNREACHABLE so that looking up the 9 cells around every agent is a single fancy-indexing operation, with walls and cells cut off from the player counting as UNREACHABLE too.
+    """
+
+    UNREACHABLE = np.iinfo(np.int32).max
+
+    def __init__(self, level, count = AGENT_COUNT, wanderer_percent = AGENT_WANDERER_PERCENT, seed = None):
+        """
+        Initializes class instance and places the agents on random cells reachable from the start cell, at least AGENT_MIN_SPAWN_DISTANCE steps away from it where possible.
+
+        Parameters
+        ----------
+        level: array
+            2D numpy array containing coded cells (see level_generator.py module for codes), referenced rather than copied so walls changed in place are seen on the next update_field
+        count: integer
+            The number of agents, defaults to AGENT_COUNT in the config.py module
+        wanderer_percent: integer
+            The likelihood of an agent being a wanderer rather than a chaser, defaults to AGENT_WANDERER_PERCENT in the config.py module
+        seed: integer
+            Optional, seed for the agents' random choices
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        self.level = level
+        self.rng = np.random.default_rng(seed)
+
+        start = tuple(int(i) for i in np.argwhere(level == 2)[0])
+        self.update_field(start)
+
+        cells = np.argwhere((self.field >= AGENT_MIN_SPAWN_DISTANCE) & (level == 0))
+
+        if len(cells) == 0:
+            cells = np.argwhere(self.field > 0)
+
+        if len(cells) == 0:
+            cells = np.array([start])
+
+        spawn = cells[self.rng.integers(len(cells), size = count)]
+
+        self.y = spawn[:, 0]
+        self.x = spawn[:, 1]
+        self.chaser = self.rng.random(count) * 100 >= wanderer_percent
+
+    def update_field(self, player):
+        """
+        Recomputes the flow field towards the player's cell. Called by Game.check_valid_move and Game.change_walls in the main.py module, once per player step or wall change however many agents there are.
+
+        Parameters
+        ----------
+        player: tuple
+            The (y, x) coordinates of the player's cell
+
+        Returns
+        -------
+        self.field: array
+            2D numpy array of the minimum number of steps from the player's cell to every cell, -1 for walls and cells which cannot be reached
+
+        Raises
+        ------
+        None
+        """
+
+        self.player = player
+
+        sources = np.zeros(self.level.shape, dtype = bool)
+        sources[player] = True
+
+        self.field = distance_fields(self.level[np.newaxis], sources[np.newaxis])[0]
+        self.padded = np.pad(np.where(self.field >= 0, self.field, self.UNREACHABLE), 1, constant_values = self.UNREACHABLE)
+
+        return self.field
+
+    def step(self):
+        """
+        Moves every agent once: chasers to the neighboring cell (or their own) closest to the player, ties broken at random so agents spread out, and wanderers to a random neighboring cell (or their own) from which the player can be reached. Walls and cells the player cannot be reached from are never moved onto, and an agent with no cell it can move onto (e.g. after a wall change cut it off from the player) stays where it is.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        boolean
+            Returns True when a chaser has caught the player (see caught) and False when none has
+
+        Raises
+        ------
+        None
+        """
+
+        number_agents = len(self.y)
+
+        cells_y = self.y[:, np.newaxis] + MOVES[:, 0]
+        cells_x = self.x[:, np.newaxis] + MOVES[:, 1]
+        distances = self.padded[cells_y + 1, cells_x + 1]
+
+        ties = self.rng.random((number_agents, len(MOVES)))
+        walkable = distances != self.UNREACHABLE
+
+        # walls, cells outside the level, and cells cut off from the player are never chosen; an agent with no such neighbor stays where it is (MOVES[0])
+        scores = np.where(walkable, np.where(self.chaser[:, np.newaxis], distances + ties * 0.5, ties), np.inf)
+        chosen = np.where(np.isfinite(scores).any(axis = 1), np.argmin(scores, axis = 1), 0)
+
+        agents = np.arange(number_agents)
+        self.y = cells_y[agents, chosen]
+        self.x = cells_x[agents, chosen]
+
+        return self.caught()
+
+    def caught(self):
+        """
+        Returns True when a chaser is on the player's cell and False otherwise.
+        """
+
+        return bool(np.any(self.chaser & (self.y == self.player[0]) & (self.x == self.player[1])))
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""
+This file is a module for the game Automaze. It represents a level array as a bitboard, a single Python integer with one bit per cell, and finds the minimum number of steps from start to finish cells with a wavefront search in which every breadth-first layer costs a handful of shifts and ORs of the whole board rather than one operation per cell. Given an upper bound on the number of steps, the search gives up as soon as the finish cell can no longer be reached within it. It is imported into the Automaze level_generator.py and fuzz.py modules.
+"""
+
+from functools import lru_cache
+import numpy as np
+
+class Bitboard():
+    """
+    Bitboard of a level array: cell (y, x) is bit y * width + x. A wavefront layer spreads to all 8 neighbors at once by shifting the board one bit left and right (masking off bits which wrapped around to the other side of a row) and then one row up and down.
+    """
+
+    def __init__(self, level):
+        """
+        Initializes class instance from a level array.
+
+        Parameters
+        ----------
+        level: array
+            2D numpy array containing coded cells (see level_generator.py module for codes), with exactly one start cell (2) and one finish cell (3)
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        IndexError
+            Raised when level contains no start or no finish cell
+        """
+
+        self.height, self.width = level.shape
+
+        self.walkable = to_bits(level != 1)
+        self.start = 1 << int(np.flatnonzero(level == 2)[0])
+        self.finish_y, self.finish_x = divmod(int(np.flatnonzero(level == 3)[0]), self.width)
+        self.finish = 1 << (self.finish_y * self.width + self.finish_x)
+
+        first_column = np.zeros(level.shape, dtype = bool)
+        first_column[:, 0] = True
+        last_column = np.zeros(level.shape, dtype = bool)
+        last_column[:, -1] = True
+
+        self.not_first_column = to_bits(~first_column)
+        self.not_last_column = to_bits(~last_column)
+
+    def expand(self, frontier):
+        """
+        Returns the frontier together with every cell one step (vertically, horizontally, or diagonally) from it, walls included.
+        """
+
+        horizontal = frontier | ((frontier << 1) & self.not_first_column) | ((frontier >> 1) & self.not_last_column)
+
+        return horizontal | (horizontal << self.width) | (horizontal >> self.width)
+
+    def min_steps(self, max_steps = None):
+        """
+        Wavefront search from the start cell to the finish cell. Every path to the finish cell not found yet passes through the current frontier, and no cell of the frontier can reach the finish cell in fewer steps than its distance in king moves, so once the frontier no longer touches the box of radius max_steps minus the steps taken around the finish cell (see finish_boxes), the minimum number of steps is certain to be above max_steps and the search stops.
+
+        Parameters
+        ----------
+        max_steps: integer
+            Optional, the number of steps beyond which the search gives up, None for a full search
+
+        Returns
+        -------
+        path_found: boolean or None
+            Returns True when the finish cell can be reached from the start cell, False when it cannot be, and None when the search gave up before finding out
+        min_number_steps: integer
+            The minimum number of steps from the start to the finish cell, 0 if no path was found, and max_steps + 1 (a lower bound) if the search gave up
+
+        Raises
+        ------
+        None
+        """
+
+        boxes = finish_boxes(self.width, self.height, self.finish_y, self.finish_x)
+        visited = self.start
+        frontier = self.start
+        steps = 0
+
+        while frontier:
+            if frontier & self.finish:
+                return True, steps
+
+            if max_steps is not None and (steps > max_steps or (max_steps - steps < len(boxes) and not frontier & boxes[max_steps - steps])):
+                return None, max_steps + 1
+
+            frontier = self.expand(frontier) & self.walkable & ~visited
+            visited |= frontier
+            steps = steps + 1
+
+        return False, 0
+
+    def connected(self):
+        """
+        Returns True when the finish cell can be reached from the start cell and False when it cannot be.
+        """
+
+        return self.min_steps()[0]
+
+def to_bits(cells):
+    """
+    Packs a 2D boolean numpy array into a Python integer, cell (y, x) becoming bit y * width + x.
+    """
+
+    return int.from_bytes(np.packbits(cells.ravel(), bitorder = "little").tobytes(), "little")
+
+@lru_cache(maxsize = 4096)
+def finish_boxes(width, height, finish_y, finish_x):
+    """
+    Returns, for every radius smaller than the distance from a finish cell to the furthest edge of the board, the cells at most that many steps from the finish cell (a square of side 2 * radius + 1, clipped to the board) as a bitmask. Larger boxes hold the whole board and rule nothing out, so they are left off. Cached, as levels of one size share a few hundred finish cells.
+    """
+
+    reach = max(finish_y, height - 1 - finish_y, finish_x, width - 1 - finish_x)
+    y, x = np.ogrid[:height, :width]
+
+    return tuple(to_bits((abs(y - finish_y) <= radius) & (abs(x - finish_x) <= radius)) for radius in range(reach))
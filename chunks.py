@@ -0,0 +1,332 @@
+"""
+This file is a module for the game Automaze. It provides the endless maze, which is generated in square chunks around the player as they move rather than as one fixed level array, with chunks generated in the background and evicted again once they are far from the player. It is imported into the Automaze main.py module and references the config.py and level_generator.py modules.
+"""
+
+from config import *
+from level_generator import carve_cheapest_path
+
+import numpy as np
+import random
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+class ChunkedMaze():
+    """
+    Endless maze made of CHUNK_SIZE x CHUNK_SIZE chunks addressed by world cell coordinates (x to the right, y downwards, both unbounded in either direction). Every chunk is generated from the world seed and its own chunk coordinates only, so an evicted chunk is regenerated identically when the player returns.
+
+    Neighboring chunks agree on their shared edge through a door: the edge between two chunks is seeded from the world seed and the edge coordinates, so both chunks pick the same door position and open the cells on their side of it. All doors of a chunk are then joined with carve_cheapest_path from the level_generator.py module, so every chunk can be crossed and the whole maze is connected.
+
+    Cells are coded as in the level_generator.py module (0 == open cell, 1 == wall cell); the endless maze has no finish cell.
+    """
+
+    def __init__(self, seed = None, chunk_size = CHUNK_SIZE, memory_budget = CHUNK_MEMORY_BUDGET):
+        """
+        Initializes class instance and starts the background worker which generates chunks.
+
+        Parameters
+        ----------
+        seed: integer
+            Optional, the world seed; a new one is drawn from the global random state if not provided
+        chunk_size: integer
+            The width and height of a chunk in cells, must be minimum 3
+        memory_budget: integer
+            The maximum number of bytes of chunk arrays kept in memory, least recently used chunks beyond it are evicted
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        if seed is None:
+            seed = random.getrandbits(64)
+
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.memory_budget = memory_budget
+        self.wall_percent = WALL_PERCENT
+
+        self.chunks = OrderedDict()
+        self.pending = {}
+        self.memory_used = 0
+        self.executor = ThreadPoolExecutor(max_workers = 1)
+
+    def door(self, orientation, chunk_x, chunk_y):
+        """
+        Returns the position of the door in the west ("v") or north ("h") edge of a chunk, which is the east or south edge of its neighbor.
+
+        Parameters
+        ----------
+        orientation: string
+            "v" for the vertical edge on the west side of the chunk, "h" for the horizontal edge on its north side
+        chunk_x: integer
+            The x coordinate of the chunk
+        chunk_y: integer
+            The y coordinate of the chunk
+
+        Returns
+        -------
+        integer
+            The row (vertical edge) or column (horizontal edge) of the door within the chunk
+
+        Raises
+        ------
+        None
+        """
+
+        return random.Random(f"{self.seed}:{orientation}:{chunk_x}:{chunk_y}").randrange(self.chunk_size)
+
+    def generate_chunk(self, chunk_x, chunk_y):
+        """
+        Generates the array of one chunk; randomized walls, the doors on all four edges, and carved paths joining the doors (and, for the chunk containing the world origin, the origin cell where the player starts).
+
+        Parameters
+        ----------
+        chunk_x: integer
+            The x coordinate of the chunk
+        chunk_y: integer
+            The y coordinate of the chunk
+
+        Returns
+        -------
+        chunk: array
+            2D numpy array of size chunk_size x chunk_size and type uint8 containing coded cells
+
+        Raises
+        ------
+        None
+        """
+
+        size = self.chunk_size
+        rng = np.random.default_rng(random.Random(f"{self.seed}:{chunk_x}:{chunk_y}").getrandbits(64))
+
+        chunk = (rng.random((size, size)) < self.wall_percent / 100).astype(np.uint8)
+
+        doors = [
+            (self.door("v", chunk_x, chunk_y), 0),
+            (self.door("v", chunk_x + 1, chunk_y), size - 1),
+            (0, self.door("h", chunk_x, chunk_y)),
+            (size - 1, self.door("h", chunk_x, chunk_y + 1))
+        ]
+
+        if chunk_x == 0 and chunk_y == 0:
+            doors.append((0, 0))
+
+        for door in doors:
+            chunk[door] = 0
+
+        for door in doors[1:]:
+            carve_cheapest_path(chunk, doors[0], door)
+
+        return chunk
+
+    def request(self, chunk_x, chunk_y):
+        """
+        Queues a chunk for generation in the background, unless it is already in memory or queued.
+
+        Parameters
+        ----------
+        chunk_x: integer
+            The x coordinate of the chunk
+        chunk_y: integer
+            The y coordinate of the chunk
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        key = (chunk_x, chunk_y)
+
+        if key not in self.chunks and key not in self.pending:
+            self.pending[key] = self.executor.submit(self.generate_chunk, chunk_x, chunk_y)
+
+    def store(self, key, chunk):
+        """
+        Adds a chunk to memory as the most recently used one and evicts least recently used chunks until the memory budget is met again (the most recently used chunk is always kept).
+
+        Parameters
+        ----------
+        key: tuple
+            The (x, y) coordinates of the chunk
+        chunk: array
+            2D numpy array of the chunk
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        self.chunks[key] = chunk
+        self.memory_used += chunk.nbytes
+
+        while self.memory_used > self.memory_budget and len(self.chunks) > 1:
+            evicted_key, evicted_chunk = self.chunks.popitem(last = False)
+            self.memory_used -= evicted_chunk.nbytes
+
+    def poll(self):
+        """
+        Moves chunks finished by the background worker into memory. Called by Game.on_update in the main.py module.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        integer
+            The number of chunks moved into memory
+
+        Raises
+        ------
+        None
+        """
+
+        finished = [key for key, future in self.pending.items() if future.done()]
+
+        for key in finished:
+            self.store(key, self.pending.pop(key).result())
+
+        return len(finished)
+
+    def get_chunk(self, chunk_x, chunk_y):
+        """
+        Returns a chunk and marks it as the most recently used one; waits for the background worker if it is queued and generates it straight away if it is neither in memory nor queued.
+
+        Parameters
+        ----------
+        chunk_x: integer
+            The x coordinate of the chunk
+        chunk_y: integer
+            The y coordinate of the chunk
+
+        Returns
+        -------
+        chunk: array
+            2D numpy array of the chunk
+
+        Raises
+        ------
+        None
+        """
+
+        key = (chunk_x, chunk_y)
+
+        if key in self.chunks:
+            self.chunks.move_to_end(key)
+            return self.chunks[key]
+
+        if key in self.pending:
+            chunk = self.pending.pop(key).result()
+        else:
+            chunk = self.generate_chunk(chunk_x, chunk_y)
+
+        self.store(key, chunk)
+
+        return chunk
+
+    def get_cell(self, x, y):
+        """
+        Returns the code of a single cell in world coordinates, across chunk borders. Called by Game.check_valid_move in the main.py module.
+
+        Parameters
+        ----------
+        x: integer
+            The world x coordinate of the cell
+        y: integer
+            The world y coordinate of the cell
+
+        Returns
+        -------
+        integer
+            The cell code (0 == open cell, 1 == wall cell)
+
+        Raises
+        ------
+        None
+        """
+
+        chunk = self.get_chunk(x // self.chunk_size, y // self.chunk_size)
+
+        return int(chunk[y % self.chunk_size, x % self.chunk_size])
+
+    def get_window(self, left, top, width, height):
+        """
+        Assembles the cells of a rectangle in world coordinates, across chunk borders, into one array. Called by Game.generate_new_level and Game.check_valid_move in the main.py module so Game.on_draw can render it like a level array.
+
+        Parameters
+        ----------
+        left: integer
+            The world x coordinate of the leftmost column
+        top: integer
+            The world y coordinate of the top row
+        width: integer
+            The number of columns
+        height: integer
+            The number of rows
+
+        Returns
+        -------
+        window: array
+            2D numpy array of size height x width containing coded cells
+
+        Raises
+        ------
+        None
+        """
+
+        window = np.ones((height, width))
+        size = self.chunk_size
+
+        for chunk_y in range(top // size, (top + height - 1) // size + 1):
+            for chunk_x in range(left // size, (left + width - 1) // size + 1):
+                chunk = self.get_chunk(chunk_x, chunk_y)
+
+                y0 = max(top, chunk_y * size)
+                y1 = min(top + height, (chunk_y + 1) * size)
+                x0 = max(left, chunk_x * size)
+                x1 = min(left + width, (chunk_x + 1) * size)
+
+                window[y0 - top:y1 - top, x0 - left:x1 - left] = chunk[y0 - chunk_y * size:y1 - chunk_y * size, x0 - chunk_x * size:x1 - chunk_x * size]
+
+        return window
+
+    def update_player(self, x, y):
+        """
+        Queues all chunks within CHUNK_LOAD_RADIUS chunks of the player for background generation and moves finished ones into memory, so they are ready before the player reaches them.
+
+        Parameters
+        ----------
+        x: integer
+            The world x coordinate of the player
+        y: integer
+            The world y coordinate of the player
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        chunk_x = x // self.chunk_size
+        chunk_y = y // self.chunk_size
+
+        for neighbor_y in range(chunk_y - CHUNK_LOAD_RADIUS, chunk_y + CHUNK_LOAD_RADIUS + 1):
+            for neighbor_x in range(chunk_x - CHUNK_LOAD_RADIUS, chunk_x + CHUNK_LOAD_RADIUS + 1):
+                self.request(neighbor_x, neighbor_y)
+
+        self.poll()
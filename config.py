@@ -1,5 +1,5 @@
 """
-This file is a module for the game Automaze. It provides constants for the screen size, title, text rows, and number of maze cells, as well as the difficulty_scale function, which references a difficulty setting against the minimum number of steps required to get from the start to finish cells (see the level_generator.py module for more information). It is imported into the Automaze level_generator.py, main.py, rooms.py, and sprites.py modules.
+This file is a module for the game Automaze. It provides constants for the screen size, title, text rows, redraw and update rates, and number of maze cells, the level generator version, wall density, solver backend, generation time budget, and log level, the endless maze chunks, level thumbnails, the fuzzing harness, the soak test, the player history and session stats files, the session snapshot, the seen-level filter, the dynamic maze, the agents, the difficulty score, as well as the difficulty_scale, difficulty_band, and difficulty_distance functions, which reference a difficulty setting against the minimum number of steps required to get from the start to finish cells (see the level_generator.py module for more information). It is imported into the Automaze level_generator.py, agents.py, chunks.py, dedup.py, density_controller.py, dynamic_maze.py, fuzz.py, generators.py, main.py, maze_features.py, player_history.py, rooms.py, snapshot.py, soak.py, sprites.py, and thumbnails.py modules.
 """
 
 TILES_WIDE = 20
@@ -15,9 +15,77 @@ SCALING = 1
 SCREEN_WIDTH = TILES_WIDE * TILE_SIZE + HORIZONTAL_MARGIN * 2
 SCREEN_HEIGHT = TILES_HIGH * TILE_SIZE + VERTICAL_MARGIN * 2
 
+RENDER_ON_CHANGE = True
+REDRAW_FRAMES = 2
+UPDATE_RATE = 1 / 60
+IDLE_UPDATE_RATE = 1 / 10
+
 DEFAULT_LINE_HEIGHT = 45
 DEFAULT_FONT_SIZE = 20
 
+GENERATOR_VERSION = 1
+LEVEL_GENERATOR = "noise"
+WALL_PERCENT = 30
+CELLULAR_ITERATIONS = 4
+
+MIN_WALL_PERCENT = 5
+MAX_WALL_PERCENT = 60
+WALL_PERCENT_STEP = 0.5
+SEPARATION_RELAX = 0.1
+DENSITY_CONTROLLER_FILE = "./player_stats/density_controller.json"
+REPAIR_DISCONNECTED_LEVELS = True
+SOLVER_BACKEND = "bitboard"
+
+GENERATION_TIME_BUDGET = 0.2
+GENERATION_FALLBACK_GENERATOR = "backtracker"
+LOG_LEVEL = "INFO"
+
+ENDLESS_MODE = False
+CHUNK_SIZE = 16
+CHUNK_LOAD_RADIUS = 1
+CHUNK_MEMORY_BUDGET = 64 * CHUNK_SIZE * CHUNK_SIZE
+
+THUMBNAIL_TILE_SIZE = 10
+THUMBNAIL_BATCH_SIZE = 256
+
+FUZZ_CASES = 300
+FUZZ_MAX_SIZE = 24
+FUZZ_FAILURE_DIR = "./fuzz_failures"
+
+SOAK_LEVELS = 2000
+SOAK_WARMUP_LEVELS = 100
+SOAK_MIN_LEVELS = 100
+SOAK_MIN_WARMUP_LEVELS = 10
+SOAK_MIN_WINDOW_LEVELS = 300
+SOAK_MIN_WINDOW_WARMUP_LEVELS = 100
+SOAK_BUDGET_PER_LEVEL = 1024
+SOAK_RSS_BUDGET_PER_LEVEL = 4096
+SOAK_TRACEBACK_FRAMES = 5
+
+USERNAME = "noname"
+PLAYER_HISTORY_FILE = "./player_stats/player_history.sqlite"
+PLAYER_HISTORY_BATCH_SIZE = 10
+SESSION_STATS_BATCH_SIZE = 10
+
+RESUME_FROM_SNAPSHOT = True
+SNAPSHOT_FILE = "./player_stats/snapshot.bin"
+
+REJECT_SEEN_LEVELS = True
+SEEN_LEVELS_BITS = 32768
+SEEN_LEVELS_HASHES = 7
+
+DYNAMIC_MAZE = False
+DYNAMIC_WALL_INTERVAL = 2
+DYNAMIC_WALL_CHANGES = 2
+
+AGENT_COUNT = 0
+AGENT_WANDERER_PERCENT = 50
+AGENT_MOVE_INTERVAL = 0.5
+AGENT_MIN_SPAWN_DISTANCE = 5
+
+USE_FEATURE_SCORE = False
+DIFFICULTY_FEATURE_WEIGHTS = {"turns": 0.5, "dead_ends": 0.1}
+
 def difficulty_scale(number_steps):
     """
     References the minimum number of steps required to get from the start to finish cells against a difficulty setting. Called by the level_generator.py and main.py modules.
@@ -45,4 +113,65 @@ def difficulty_scale(number_steps):
     elif 11 <= number_steps < 16:
         return "Level 3"
     elif 16 <= number_steps:
-        return "Level 4"
\ No newline at end of file
+        return "Level 4"
+
+def difficulty_band(player_difficulty):
+    """
+    Returns the range of minimum number of steps which difficulty_scale maps to a difficulty setting, i.e. the inverse of difficulty_scale. Called by the density_controller.py module.
+
+    Parameters
+    ----------
+    player_difficulty: string
+        The difficulty setting, expressed as "Level n" where n is between 1 (easiest) and 4 (hardest)
+
+    Returns
+    -------
+    tuple
+        The lowest and highest minimum number of steps (both inclusive) for the difficulty setting; the highest is None for "Level 4" which has no upper limit
+
+    Raises
+    ------
+    KeyError
+        Raised when player_difficulty is not one of "Level 1" to "Level 4"
+
+    """
+
+    return {
+        "Level 1": (1, 5),
+        "Level 2": (6, 10),
+        "Level 3": (11, 15),
+        "Level 4": (16, None)
+    }[player_difficulty]
+
+def difficulty_distance(number_steps, player_difficulty):
+    """
+    Returns how many steps a minimum number of steps lies outside the band of a difficulty setting (see difficulty_band), 0 if it lies inside. Called by generate_validated_level in the level_generator.py module to pick the closest candidate level when generation runs out of time.
+
+    Parameters
+    ----------
+    number_steps: integer
+        The minimum number of steps required to travel from the start to finish cells
+    player_difficulty: string
+        The difficulty setting, expressed as "Level n" where n is between 1 (easiest) and 4 (hardest)
+
+    Returns
+    -------
+    integer
+        The number of steps below the lowest or above the highest of the band
+
+    Raises
+    ------
+    KeyError
+        Raised when player_difficulty is not one of "Level 1" to "Level 4"
+
+    """
+
+    min_steps, max_steps = difficulty_band(player_difficulty)
+
+    if number_steps < min_steps:
+        return min_steps - number_steps
+
+    elif max_steps is not None and number_steps > max_steps:
+        return number_steps - max_steps
+
+    return 0
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+This file is a module for the game Automaze. It stops a player from being served the same maze twice: every level array gets a fingerprint which is the same for all its mirror images and rotations, and each player has a Bloom filter of the fingerprints of the levels they have been served, which answers "seen before?" in constant time and a fixed few KB however many levels are added. It is imported into the Automaze main.py, level_generator.py, and player_history.py modules and references the config.py module.
+"""
+
+from config import *
+
+import hashlib
+import numpy as np
+
+def level_fingerprint(level):
+    """
+    Returns a 64-bit fingerprint of a level array which does not change under symmetry: the array is mirrored and rotated in every way that keeps its shape (8 ways for square levels, 4 otherwise), and the smallest of the resulting byte strings is hashed. Start and finish cells are part of the fingerprint, so the same walls with different start and finish cells count as a different level.
+
+    Parameters
+    ----------
+    level: array
+        2D numpy array containing coded cells (see level_generator.py module for codes)
+
+    Returns
+    -------
+    integer
+        The fingerprint
+
+    Raises
+    ------
+    None
+    """
+
+    level = np.asarray(level).astype(np.uint8)
+    variants = [level, level[::-1], level[:, ::-1], level[::-1, ::-1]]
+
+    if level.shape[0] == level.shape[1]:
+        variants = variants + [variant.T for variant in variants]
+
+    canonical = min(f"{variant.shape}".encode() + np.ascontiguousarray(variant).tobytes() for variant in variants)
+
+    return int.from_bytes(hashlib.blake2b(canonical, digest_size = 8).digest(), "little")
+
+class SeenLevels():
+    """
+    Bloom filter of level fingerprints: each fingerprint sets number_hashes of the bits of a fixed-size bit array, derived from the fingerprint by double hashing. Membership tests never miss a level that was added; with the defaults (SEEN_LEVELS_BITS and SEEN_LEVELS_HASHES in the config.py module, 4 KB) fewer than 1 in 100 unseen levels are wrongly reported as seen after 3000 levels.
+    """
+
+    def __init__(self, bits = None, number_bits = SEEN_LEVELS_BITS, number_hashes = SEEN_LEVELS_HASHES):
+        """
+        Initializes class instance, empty or from the bytes saved with to_bytes.
+
+        Parameters
+        ----------
+        bits: bytes
+            Optional, the bit array as returned by to_bytes
+        number_bits: integer
+            The size of the bit array in bits, must be a multiple of 8, defaults to SEEN_LEVELS_BITS in the config.py module
+        number_hashes: integer
+            The number of bits set per fingerprint, defaults to SEEN_LEVELS_HASHES in the config.py module
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        self.number_bits = number_bits
+        self.number_hashes = number_hashes
+        self.bits = bytearray(number_bits // 8)
+
+        if bits is not None and len(bits) == len(self.bits):
+            self.bits[:] = bits
+
+    def positions(self, fingerprint):
+        """
+        Returns the bit positions of a fingerprint.
+        """
+
+        first = fingerprint & 0xFFFFFFFF
+        second = (fingerprint >> 32) | 1
+
+        return [(first + i * second) % self.number_bits for i in range(self.number_hashes)]
+
+    def add(self, fingerprint):
+        """
+        Adds a fingerprint (see level_fingerprint) to the filter.
+
+        Parameters
+        ----------
+        fingerprint: integer
+            The fingerprint of a level
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        for position in self.positions(fingerprint):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, fingerprint):
+        """
+        Returns True when the fingerprint has (most likely) been added and False when it has certainly not.
+        """
+
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(fingerprint))
+
+    def to_bytes(self):
+        """
+        Returns the bit array, for saving with PlayerHistory.save_seen_levels in the player_history.py module.
+        """
+
+        return bytes(self.bits)
\ No newline at end of file
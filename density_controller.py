@@ -0,0 +1,275 @@
+"""
+This file is a module for the game Automaze. It tunes the wall density of randomly generated levels per difficulty setting while the game is played, so that as many generated levels as possible are accepted by generate_validated_level in the level_generator.py module, and persists what it has learned between sessions. It is imported into the Automaze main.py module and references the config.py module.
+"""
+
+from config import *
+
+import json
+import os
+import pandas as pd
+
+class DensityController():
+    """
+    Online controller which tracks the outcome of every level generated for a difficulty setting (aka tier) and nudges that tier's wall density and minimum start/finish separation towards the values with the highest acceptance rate.
+
+    Outcomes recorded with record:
+    "accepted" == path found and difficulty validated
+    "too_near" == start and finish cells closer together than the minimum separation, rejected before find_path is called, minimum separation relaxed slightly
+    "too_far" == start and finish cells further apart than the upper end of the tier, rejected before find_path is called, parameters unchanged
+    "no_path" == no path from start to finish cells, wall density decreased
+    "too_short" == minimum number of steps below the tier, wall density and minimum separation increased
+    "too_long" == minimum number of steps above the tier, wall density and minimum separation decreased
+    "repeat" == difficulty validated but the player has been served the level before (see the dedup.py module), parameters unchanged
+
+    The maximum separation is not learned: the minimum number of steps can never be lower than the number of king moves between start and finish cells, so any level whose start and finish cells are further apart than the upper end of the tier is rejected without running find_path. Those rejections say nothing about the minimum separation, so they never relax it; the start and finish cells are placed by the seeded generator (see the generators.py module), so the level ID still rebuilds every level exactly.
+    """
+
+    OUTCOMES = ["accepted", "too_near", "too_far", "no_path", "too_short", "too_long", "repeat"]
+
+    def __init__(self, path = DENSITY_CONTROLLER_FILE):
+        """
+        Initializes class instance and loads previously learned parameters from path, if it exists.
+
+        Parameters
+        ----------
+        path: string
+            The .json file the learned parameters and acceptance statistics are loaded from and saved to, defaults to DENSITY_CONTROLLER_FILE in the config.py module
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        self.path = path
+        self.tiers = {}
+
+        if self.path is not None and os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    self.tiers = json.load(f)
+
+            except (OSError, ValueError):
+                self.tiers = {}
+
+    def tier(self, player_difficulty):
+        """
+        Returns the learned parameters and acceptance statistics of a tier, creating them with the defaults from the config.py module the first time a tier is seen.
+
+        Parameters
+        ----------
+        player_difficulty: string
+            The difficulty setting, expressed as "Level n" where n is between 1 (easiest) and 4 (hardest)
+
+        Returns
+        -------
+        dictionary
+            With keys "wall_percent" (float), "min_separation" (float), "seconds" (float, total generation time) and one count per outcome (see class documentation)
+
+        Raises
+        ------
+        None
+        """
+
+        if player_difficulty not in self.tiers:
+            self.tiers[player_difficulty] = {"wall_percent": float(WALL_PERCENT), "min_separation": 1, "seconds": 0.0}
+
+        for outcome in self.OUTCOMES:
+            self.tiers[player_difficulty].setdefault(outcome, 0)
+
+        return self.tiers[player_difficulty]
+
+    def parameters(self, player_difficulty):
+        """
+        Returns the generation parameters to use for the next level of a tier.
+
+        Parameters
+        ----------
+        player_difficulty: string
+            The difficulty setting, expressed as "Level n" where n is between 1 (easiest) and 4 (hardest)
+
+        Returns
+        -------
+        wall_percent: integer
+            The likelihood in percent of an inner cell being a wall (see LevelGenerator.wall_percent in the level_generator.py module)
+        min_separation: integer
+            The minimum number of king moves between start and finish cells
+        max_separation: integer or None
+            The maximum number of king moves between start and finish cells, None if the tier has no upper limit
+
+        Raises
+        ------
+        None
+        """
+
+        settings = self.tier(player_difficulty)
+
+        return int(round(settings["wall_percent"])), int(settings["min_separation"]), difficulty_band(player_difficulty)[1]
+
+    def screen(self, level, player_difficulty):
+        """
+        Checks the separation of the start and finish cells of a freshly generated level against the tier, which is much cheaper than calling LevelGenerator.find_path.
+
+        Parameters
+        ----------
+        level: object
+            LevelGenerator instance on which generate_level has been called
+        player_difficulty: string
+            The difficulty setting, expressed as "Level n" where n is between 1 (easiest) and 4 (hardest)
+
+        Returns
+        -------
+        string or None
+            Returns None when the level is worth passing to find_path, and the outcome "too_near" or "too_far" (see class documentation) when it can be rejected straight away
+
+        Raises
+        ------
+        None
+        """
+
+        wall_percent, min_separation, max_separation = self.parameters(player_difficulty)
+        separation = max(abs(level.finish_x - level.start_x), abs(level.finish_y - level.start_y))
+
+        if separation < min_separation:
+            return "too_near"
+
+        if max_separation is not None and separation > max_separation:
+            return "too_far"
+
+        return None
+
+    def classify(self, level, player_difficulty):
+        """
+        Classifies a level on which find_path and validate_difficulty have been called into one of the outcomes in the class documentation.
+
+        Parameters
+        ----------
+        level: object
+            LevelGenerator instance
+        player_difficulty: string
+            The difficulty setting, expressed as "Level n" where n is between 1 (easiest) and 4 (hardest)
+
+        Returns
+        -------
+        string
+            The outcome
+
+        Raises
+        ------
+        None
+        """
+
+        if level.path_found == False:
+            return "no_path"
+
+        elif level.difficulty_validated == True:
+            return "accepted"
+
+        elif level.min_number_steps < difficulty_band(player_difficulty)[0]:
+            return "too_short"
+
+        else:
+            return "too_long"
+
+    def record(self, player_difficulty, outcome, seconds):
+        """
+        Records the outcome of one generated level and adjusts the tier's parameters: levels without a path lower the wall density, levels that are too short raise the wall density and minimum separation, and levels that are too long lower both. Levels rejected for start and finish cells too close together relax the minimum separation by SEPARATION_RELAX from the config.py module, a fraction of a step because those rejections are far cheaper than find_path; levels rejected for start and finish cells too far apart, accepted levels, and repeated levels leave the parameters unchanged.
+
+        Parameters
+        ----------
+        player_difficulty: string
+            The difficulty setting, expressed as "Level n" where n is between 1 (easiest) and 4 (hardest)
+        outcome: string
+            One of the outcomes in the class documentation
+        seconds: float
+            Time spent generating and checking the level
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        settings = self.tier(player_difficulty)
+        settings[outcome] += 1
+        settings["seconds"] += seconds
+
+        min_steps, max_steps = difficulty_band(player_difficulty)
+
+        if outcome == "too_near":
+            settings["min_separation"] = max(settings["min_separation"] - SEPARATION_RELAX, 1)
+
+        elif outcome == "no_path":
+            settings["wall_percent"] -= WALL_PERCENT_STEP
+
+        elif outcome == "too_short":
+            settings["wall_percent"] += WALL_PERCENT_STEP
+            settings["min_separation"] = min(settings["min_separation"] + 1, min_steps)
+
+        elif outcome == "too_long":
+            settings["wall_percent"] -= WALL_PERCENT_STEP
+            settings["min_separation"] = max(settings["min_separation"] - 1, 1)
+
+        settings["wall_percent"] = min(max(settings["wall_percent"], MIN_WALL_PERCENT), MAX_WALL_PERCENT)
+
+    def acceptance_stats(self):
+        """
+        Summarizes the acceptance statistics and current parameters of every tier seen so far.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dataframe
+            One row per tier with columns "wall_percent", "min_separation", "attempts", one column per outcome, "acceptance_rate" (accepted levels per attempt), and "levels_per_second" (accepted levels per second of generation time)
+
+        Raises
+        ------
+        None
+        """
+
+        rows = []
+
+        for player_difficulty in sorted(self.tiers):
+            settings = self.tier(player_difficulty)
+            attempts = sum(settings[outcome] for outcome in self.OUTCOMES)
+
+            rows.append([player_difficulty, settings["wall_percent"], settings["min_separation"], attempts] + [settings[outcome] for outcome in self.OUTCOMES] + [
+                settings["accepted"] / attempts if attempts else 0.0,
+                settings["accepted"] / settings["seconds"] if settings["seconds"] else 0.0
+            ])
+
+        return pd.DataFrame(rows, columns = ["difficulty", "wall_percent", "min_separation", "attempts"] + self.OUTCOMES + ["acceptance_rate", "levels_per_second"]).set_index("difficulty")
+
+    def save(self):
+        """
+        Saves the learned parameters and acceptance statistics to self.path so they are picked up by the next session. Called when the game ends or its window is closed (see Game.on_key_press and Game.on_close in the main.py module) rather than after every level.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        if self.path is None:
+            return
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok = True)
+
+        with open(self.path, "w") as f:
+            json.dump(self.tiers, f, indent = 1)
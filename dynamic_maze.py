@@ -0,0 +1,266 @@
+"""
+This file is a module for the game Automaze. It contains the incremental shortest-path engine (D* Lite) for the dynamic maze mode, in which walls open and close while a level is being played: after every wall change only the distances affected by the change are repaired instead of solving the level again from scratch. It is imported into the Automaze main.py and fuzz.py modules and references the config.py module.
+"""
+
+from config import *
+
+import heapq
+
+INFINITY = float("inf")
+
+class DStarLite():
+    """
+    D* Lite (Koenig and Likhachev, 2002) on a level array with the movement rules of the game: one step vertically, horizontally, or diagonally onto any cell which is not a wall, each step costing 1. Distances are searched backwards from the finish cell, so moving the start cell (the player) and changing walls both only repair the part of the search that is affected.
+
+    g and rhs hold the current and one-step-lookahead distance of every cell to the finish cell; the open list is a heap with lazy deletion, open_keys holding the valid key of every cell currently on it.
+    """
+
+    def __init__(self, level, start, finish):
+        """
+        Initializes class instance and computes the initial distances.
+
+        Parameters
+        ----------
+        level: array
+            2D numpy array containing coded cells (see level_generator.py module for codes), only walls (1) are referred to
+        start: tuple
+            The (y, x) coordinates of the start cell (or the player's current cell)
+        finish: tuple
+            The (y, x) coordinates of the finish cell
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        self.height, self.width = level.shape
+        self.walls = (level == 1).tolist()
+
+        self.start = tuple(start)
+        self.last_start = self.start
+        self.finish = tuple(finish)
+        self.km = 0
+
+        self.g = [[INFINITY] * self.width for y in range(self.height)]
+        self.rhs = [[INFINITY] * self.width for y in range(self.height)]
+        self.open_list = []
+        self.open_keys = {}
+
+        self.rhs[self.finish[0]][self.finish[1]] = 0
+        self.push(self.finish)
+        self.compute_shortest_path()
+
+    def heuristic(self, cell):
+        """
+        Number of king moves between a cell and the start cell, never more than the true distance.
+        """
+
+        return max(abs(cell[0] - self.start[0]), abs(cell[1] - self.start[1]))
+
+    def key(self, cell):
+        """
+        Priority of a cell on the open list.
+        """
+
+        distance = min(self.g[cell[0]][cell[1]], self.rhs[cell[0]][cell[1]])
+
+        return (distance + self.heuristic(cell) + self.km, distance)
+
+    def push(self, cell):
+        """
+        Adds a cell to the open list with its current key, replacing any earlier entry.
+        """
+
+        key = self.key(cell)
+        self.open_keys[cell] = key
+        heapq.heappush(self.open_list, (key, cell))
+
+    def top_key(self):
+        """
+        Returns the smallest valid key on the open list, discarding stale heap entries.
+        """
+
+        while self.open_list:
+            key, cell = self.open_list[0]
+
+            if self.open_keys.get(cell) == key:
+                return key
+
+            heapq.heappop(self.open_list)
+
+        return (INFINITY, INFINITY)
+
+    def neighbors(self, cell):
+        """
+        Returns the up to 8 cells one step from a cell which are inside the level array.
+        """
+
+        y, x = cell
+
+        return [(neighbor_y, neighbor_x) for neighbor_y in range(max(y-1, 0), min(y+2, self.height)) for neighbor_x in range(max(x-1, 0), min(x+2, self.width)) if (neighbor_y, neighbor_x) != cell]
+
+    def update_vertex(self, cell):
+        """
+        Recomputes the lookahead distance of a cell from its neighbors and puts it on (or takes it off) the open list depending on whether it is consistent.
+        """
+
+        y, x = cell
+
+        if cell != self.finish:
+            if self.walls[y][x]:
+                self.rhs[y][x] = INFINITY
+            else:
+                self.rhs[y][x] = min([self.g[neighbor_y][neighbor_x] + 1 for neighbor_y, neighbor_x in self.neighbors(cell) if not self.walls[neighbor_y][neighbor_x]] or [INFINITY])
+
+        self.open_keys.pop(cell, None)
+
+        if self.g[y][x] != self.rhs[y][x]:
+            self.push(cell)
+
+    def compute_shortest_path(self):
+        """
+        Expands cells from the open list until the distance of the start cell is correct.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        integer
+            The number of cells expanded
+
+        Raises
+        ------
+        None
+        """
+
+        expanded = 0
+        start_y, start_x = self.start
+
+        while self.top_key() < self.key(self.start) or self.rhs[start_y][start_x] != self.g[start_y][start_x]:
+            old_key, cell = heapq.heappop(self.open_list)
+            del self.open_keys[cell]
+            new_key = self.key(cell)
+            y, x = cell
+            expanded = expanded + 1
+
+            if old_key < new_key:
+                self.push(cell)
+
+            elif self.g[y][x] > self.rhs[y][x]:
+                self.g[y][x] = self.rhs[y][x]
+
+                for neighbor in self.neighbors(cell):
+                    self.update_vertex(neighbor)
+
+            else:
+                self.g[y][x] = INFINITY
+
+                for neighbor in self.neighbors(cell) + [cell]:
+                    self.update_vertex(neighbor)
+
+        return expanded
+
+    def move_start(self, start):
+        """
+        Moves the start cell, e.g. after the player took a step, and repairs the distances. Called by Game.check_valid_move in the main.py module.
+
+        Parameters
+        ----------
+        start: tuple
+            The (y, x) coordinates of the new start cell
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        self.start = tuple(start)
+        self.km = self.km + max(abs(self.start[0] - self.last_start[0]), abs(self.start[1] - self.last_start[1]))
+        self.last_start = self.start
+
+        self.compute_shortest_path()
+
+    def set_cells(self, changes):
+        """
+        Opens or closes walls and repairs the distances affected, at a cost proportional to the size of the change rather than the size of the level. Called by Game.change_walls in the main.py module.
+
+        Parameters
+        ----------
+        changes: list
+            Tuples ((y, x), is_wall) for each cell that changed
+
+        Returns
+        -------
+        integer
+            The number of cells expanded during the repair
+
+        Raises
+        ------
+        None
+        """
+
+        for (y, x), is_wall in changes:
+            if self.walls[y][x] == bool(is_wall):
+                continue
+
+            self.walls[y][x] = bool(is_wall)
+
+            for cell in self.neighbors((y, x)) + [(y, x)]:
+                self.update_vertex(cell)
+
+        return self.compute_shortest_path()
+
+    def distance(self):
+        """
+        Returns the minimum number of steps from the start cell to the finish cell.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        integer or None
+            The minimum number of steps, None if the finish cell cannot be reached
+
+        Raises
+        ------
+        None
+        """
+
+        distance = self.g[self.start[0]][self.start[1]]
+
+        return None if distance == INFINITY else int(distance)
+
+    def next_step(self):
+        """
+        Returns the cell one optimal step from the start cell towards the finish cell, e.g. for a hint.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        tuple or None
+            The (y, x) coordinates of the next cell, None if the finish cell cannot be reached or the start cell is the finish cell
+
+        Raises
+        ------
+        None
+        """
+
+        if self.distance() is None or self.start == self.finish:
+            return None
+
+        return min((neighbor for neighbor in self.neighbors(self.start) if not self.walls[neighbor[0]][neighbor[1]]), key = lambda neighbor: self.g[neighbor[0]][neighbor[1]])
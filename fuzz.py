@@ -0,0 +1,454 @@
+"""
+This file is a module for the game Automaze. It is a differential fuzzing harness which runs every registered pathfinding engine (e.g. LevelGenerator.find_path_bitboard) on random and edge-case level arrays and compares the results with a simple reference breadth-first search, and checks that every registered level generator follows the cell code rules. Disagreeing level arrays are shrunk and saved to FUZZ_FAILURE_DIR. The original greedy LevelGenerator.find_path is known not to always find the minimum number of steps and is only run when asked for with --solvers. It is run on its own (python fuzz.py) with a pool of worker processes and references the config.py, level_generator.py, dynamic_maze.py, and generators.py modules.
+"""
+
+from config import *
+from level_generator import *
+from dynamic_maze import DStarLite
+from generators import GENERATORS
+
+import argparse
+import hashlib
+import os
+import random
+import time
+import numpy as np
+from collections import deque
+from functools import partial
+from multiprocessing import Pool
+
+def reference_min_steps(level):
+    """
+    Plain breadth-first search from the start cell (2) to the finish cell (3) with the movement rules of the game: one step vertically, horizontally, or diagonally onto any cell which is not a wall (1). Deliberately kept as simple as possible as it is the reference every engine is compared against.
+
+    Parameters
+    ----------
+    level: array
+        2D numpy array containing coded cells, with exactly one start and one finish cell
+
+    Returns
+    -------
+    path_found: boolean
+        Returns True when the finish cell can be reached from the start cell and False when it cannot be
+    min_number_steps: integer or None
+        The minimum number of steps from the start to the finish cell, None if no path was found
+
+    Raises
+    ------
+    None
+    """
+
+    start = tuple(np.argwhere(level == 2)[0])
+    finish = tuple(np.argwhere(level == 3)[0])
+
+    steps = {start: 0}
+    queue = deque([start])
+
+    while queue:
+        y, x = queue.popleft()
+
+        if (y, x) == finish:
+            return True, steps[finish]
+
+        for neighbor_y in range(y-1, y+2):
+            for neighbor_x in range(x-1, x+2):
+                if 0 <= neighbor_y < level.shape[0] and 0 <= neighbor_x < level.shape[1] and (neighbor_y, neighbor_x) not in steps and level[neighbor_y, neighbor_x] != 1:
+                    steps[(neighbor_y, neighbor_x)] = steps[(y, x)] + 1
+                    queue.append((neighbor_y, neighbor_x))
+
+    return False, None
+
+def cell_code_violations(level):
+    """
+    Checks a level array against the cell code rules every level generator must follow: minimum size 4x4, only codes 0 to 3, border cells all walls, and exactly one start and one finish cell.
+
+    Parameters
+    ----------
+    level: array
+        2D numpy array containing coded cells
+
+    Returns
+    -------
+    list
+        Descriptions of the rules broken, empty if the level is valid
+
+    Raises
+    ------
+    None
+    """
+
+    violations = []
+
+    if level.ndim != 2 or level.shape[0] < 4 or level.shape[1] < 4:
+        return [f"level array of shape {level.shape} is smaller than 4x4"]
+
+    if not np.isin(level, [0, 1, 2, 3]).all():
+        violations.append(f"unknown cell codes {sorted(set(np.unique(level)) - {0, 1, 2, 3})}")
+
+    if not ((level[0] == 1).all() and (level[-1] == 1).all() and (level[:, 0] == 1).all() and (level[:, -1] == 1).all()):
+        violations.append("border cells are not all walls")
+
+    for code, name in [(2, "start"), (3, "finish")]:
+        if np.count_nonzero(level == code) != 1:
+            violations.append(f"{np.count_nonzero(level == code)} {name} cells")
+
+    return violations
+
+def solve_find_path(level):
+    """
+    Solver engine wrapping LevelGenerator.find_path.
+    """
+
+    solver = LevelGenerator.from_array(level)
+    solver.find_path()
+
+    return solver.path_found, solver.min_number_steps if solver.path_found else None
+
+def solve_bitboard(level):
+    """
+    Solver engine wrapping LevelGenerator.find_path_bitboard.
+    """
+
+    solver = LevelGenerator.from_array(level)
+    solver.find_path_bitboard()
+
+    return solver.path_found, solver.min_number_steps if solver.path_found else None
+
+def solve_bitboard_bounded(level):
+    """
+    Solver engine wrapping LevelGenerator.find_path_bitboard with a random max_steps; when the bounded search gives up, a full search must find no path or a minimum above max_steps, otherwise AssertionError is raised.
+    """
+
+    max_steps = random.Random(level.tobytes()).randint(0, level.shape[0] + level.shape[1])
+    solver = LevelGenerator.from_array(level)
+    solver.find_path_bitboard(max_steps)
+
+    if solver.path_found is None:
+        path_found, min_number_steps = LevelGenerator.from_array(level).find_path_bitboard()
+        assert path_found == False or min_number_steps > max_steps, f"gave up at max_steps {max_steps} on a level with a path of {min_number_steps} steps"
+
+        return path_found, min_number_steps if path_found else None
+
+    return solver.path_found, solver.min_number_steps if solver.path_found else None
+
+def solve_check_connectivity(level):
+    """
+    Solver engine wrapping LevelGenerator.check_connectivity; reports connectivity only, so only path_found is compared.
+    """
+
+    return LevelGenerator.from_array(level).check_connectivity(), None
+
+def solve_d_star_lite(level):
+    """
+    Solver engine wrapping DStarLite; the planner is first built on a copy of the level with some inner cells flipped between open and wall, and the flips are then undone through DStarLite.set_cells, so the incremental repair is what gets compared.
+    """
+
+    rng = random.Random(level.tobytes())
+    perturbed = level.copy()
+    flips = [(int(y), int(x)) for y, x in np.argwhere(level[1:-1, 1:-1] <= 1) + 1]
+    flips = rng.sample(flips, min(len(flips), 4))
+
+    for y, x in flips:
+        perturbed[y, x] = 1 - perturbed[y, x]
+
+    planner = DStarLite(perturbed, tuple(np.argwhere(level == 2)[0]), tuple(np.argwhere(level == 3)[0]))
+    planner.set_cells([((y, x), level[y, x] == 1) for y, x in flips])
+
+    return planner.distance() is not None, planner.distance()
+
+def generate_registered(generator, seed, width, height):
+    """
+    Generator engine wrapping LevelGenerator.generate_level with a generator from the registry of the generators.py module; levels of the "noise" generator are repaired with repair_connectivity, as in Game.generate_new_level in the main.py module, all other generators must be solvable by construction.
+    """
+
+    new_level = LevelGenerator(width, height)
+    new_level.generator = generator
+    new_level.generate_level(seed)
+
+    if generator == "noise":
+        new_level.repair_connectivity()
+
+    return new_level.level_raw
+
+# Engines compared against reference_min_steps: name -> function(level) returning (path_found, min_number_steps or None)
+SOLVER_ENGINES = {
+    "find_path": solve_find_path,
+    "bitboard": solve_bitboard,
+    "bitboard_bounded": solve_bitboard_bounded,
+    "check_connectivity": solve_check_connectivity,
+    "d_star_lite": solve_d_star_lite
+}
+
+# Engines left out of the default run: LevelGenerator.find_path is the original greedy search, which finds a path whenever there is one but not always the shortest
+KNOWN_DIVERGENT_ENGINES = {"find_path"}
+
+# Engines which only report whether there is a path, so a missing minimum number of steps is not a failure
+CONNECTIVITY_ONLY_ENGINES = {"check_connectivity"}
+
+# Generators checked with cell_code_violations: name -> (function(seed, width, height) returning a level array, whether every level must be solvable)
+GENERATOR_ENGINES = {name: (partial(generate_registered, name), True) for name in GENERATORS}
+
+def place_start_finish(level, rng, start = None, finish = None):
+    """
+    Places the start and finish cells on a copy of level, at the coordinates given or at random distinct inner cells.
+    """
+
+    level = level.copy()
+    cells = [(y, x) for y in range(1, level.shape[0] - 1) for x in range(1, level.shape[1] - 1)]
+    start = start or rng.choice(cells)
+    finish = finish or rng.choice([cell for cell in cells if cell != start])
+
+    level[start] = 2
+    level[finish] = 3
+
+    return level
+
+def random_case(rng):
+    """
+    Returns a random level array of random size (4x4 to FUZZ_MAX_SIZE) and wall density.
+    """
+
+    height = rng.randint(4, FUZZ_MAX_SIZE)
+    width = rng.randint(4, FUZZ_MAX_SIZE)
+    wall_probability = rng.random() * 0.8
+
+    level = np.ones((height, width))
+    level[1:-1, 1:-1] = [[1 if rng.random() < wall_probability else 0 for x in range(width - 2)] for y in range(height - 2)]
+
+    return place_start_finish(level, rng)
+
+def edge_cases(rng):
+    """
+    Returns a list of edge-case level arrays: minimum size 4x4, start next to finish (orthogonally and diagonally), and levels made entirely of walls apart from the start and finish cells.
+    """
+
+    cases = []
+
+    for height, width in [(4, 4), (4, 5), (5, 4), (4, FUZZ_MAX_SIZE), (FUZZ_MAX_SIZE, 4)]:
+        for interior in [0, 1]:
+            level = np.ones((height, width))
+            level[1:-1, 1:-1] = interior
+
+            cases.append(place_start_finish(level, rng, (1, 1), (height - 2, width - 2)))
+            cases.append(place_start_finish(level, rng))
+
+    for start, finish in [((2, 2), (2, 3)), ((2, 2), (3, 2)), ((2, 2), (3, 3)), ((3, 3), (2, 2))]:
+        for interior in [0, 1]:
+            level = np.ones((8, 8))
+            level[1:-1, 1:-1] = interior
+
+            cases.append(place_start_finish(level, rng, start, finish))
+
+    return cases
+
+def disagreement(engine, level):
+    """
+    Runs a solver engine and the reference on a level array and describes how they disagree, if they do (an engine raising an exception, or finding a path without its minimum number of steps unless it is in CONNECTIVITY_ONLY_ENGINES, counts as a disagreement).
+
+    Parameters
+    ----------
+    engine: string
+        Key of SOLVER_ENGINES
+    level: array
+        2D numpy array containing coded cells
+
+    Returns
+    -------
+    string or None
+        Description of the disagreement, None if the engine agrees with the reference
+
+    Raises
+    ------
+    None
+    """
+
+    expected = reference_min_steps(level)
+
+    try:
+        result = SOLVER_ENGINES[engine](level)
+
+    except Exception as error:
+        return f"raised {error!r}, reference {expected}"
+
+    if result[0] != expected[0]:
+        return f"returned {result}, reference {expected}"
+
+    if result[0] and result[1] is None and engine not in CONNECTIVITY_ONLY_ENGINES:
+        return f"returned {result} without a minimum number of steps, reference {expected}"
+
+    if result[1] is not None and expected[0] and result[1] != expected[1]:
+        return f"returned {result}, reference {expected}"
+
+    return None
+
+def shrink(engine, level):
+    """
+    Greedily shrinks a level array on which an engine disagrees with the reference while the disagreement persists: removes inner rows and columns (keeping the level at least 4x4 and keeping the start and finish cells), then turns inner walls into open cells, until no single change keeps the disagreement.
+
+    Parameters
+    ----------
+    engine: string
+        Key of SOLVER_ENGINES
+    level: array
+        2D numpy array containing coded cells on which the engine disagrees with the reference
+
+    Returns
+    -------
+    level: array
+        The shrunk level array
+
+    Raises
+    ------
+    None
+    """
+
+    changed = True
+
+    while changed:
+        changed = False
+
+        for axis in [0, 1]:
+            index = 1
+
+            while index < level.shape[axis] - 1 and level.shape[axis] > 4:
+                candidate = np.delete(level, index, axis = axis)
+
+                if np.count_nonzero(candidate == 2) == 1 and np.count_nonzero(candidate == 3) == 1 and disagreement(engine, candidate) is not None:
+                    level = candidate
+                    changed = True
+                else:
+                    index = index + 1
+
+        for y, x in np.argwhere(level[1:-1, 1:-1] == 1) + 1:
+            candidate = level.copy()
+            candidate[y, x] = 0
+
+            if disagreement(engine, candidate) is not None:
+                level = candidate
+                changed = True
+
+    return level
+
+def save_failure(name, level, out_dir = FUZZ_FAILURE_DIR):
+    """
+    Saves a level array to out_dir as a .npy file named after the engine and the hash of the array, so the same failure is only saved once.
+    """
+
+    os.makedirs(out_dir, exist_ok = True)
+    path = os.path.join(out_dir, f"{name}-{hashlib.sha1(level.tobytes()).hexdigest()[:12]}.npy")
+    np.save(path, level)
+
+    return path
+
+def run_batch(seed, number_cases, solvers, generators, include_edge_cases = False):
+    """
+    Runs one batch of fuzz cases in a worker process: every solver engine on number_cases random level arrays (plus the edge cases if include_edge_cases), and every generator engine on number_cases random seeds and sizes. Disagreeing solver cases are shrunk before saving.
+
+    Parameters
+    ----------
+    seed: integer
+        Seed for the random level arrays of this batch
+    number_cases: integer
+        The number of random cases per engine
+    solvers: list
+        Keys of SOLVER_ENGINES to run
+    generators: list
+        Keys of GENERATOR_ENGINES to run
+    include_edge_cases: boolean
+        Whether to also run the edge cases
+
+    Returns
+    -------
+    list
+        One (engine, description, saved path) tuple per failure
+
+    Raises
+    ------
+    None
+    """
+
+    rng = random.Random(seed)
+    failures = []
+
+    cases = [random_case(rng) for i in range(number_cases)]
+
+    if include_edge_cases:
+        cases = edge_cases(rng) + cases
+
+    for engine in solvers:
+        for level in cases:
+            description = disagreement(engine, level)
+
+            if description is not None:
+                level = shrink(engine, level)
+                failures.append((engine, disagreement(engine, level) or description, save_failure(engine, level)))
+
+    for engine in generators:
+        generate, must_be_solvable = GENERATOR_ENGINES[engine]
+
+        for i in range(number_cases):
+            level_seed = rng.getrandbits(64)
+            width = rng.randint(4, FUZZ_MAX_SIZE)
+            height = rng.randint(4, FUZZ_MAX_SIZE)
+
+            try:
+                level = np.asarray(generate(level_seed, width, height))
+                violations = cell_code_violations(level)
+
+                if violations == [] and must_be_solvable and reference_min_steps(level)[0] == False:
+                    violations.append("no path from start to finish cell")
+
+            except Exception as error:
+                level = np.zeros((0, 0))
+                violations = [f"raised {error!r}"]
+
+            if violations:
+                failures.append((engine, f"seed {level_seed} size {width}x{height}: {', '.join(violations)}", save_failure(engine, level)))
+
+    return failures
+
+def main():
+    """
+    Command line entry point: runs the harness with a pool of worker processes and exits with status 1 if any engine disagreed with the reference or any generator broke the cell code rules.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    SystemExit
+        Raised with status 1 when there were failures
+    """
+
+    parser = argparse.ArgumentParser(description = "Differential fuzzing of Automaze pathfinding engines and level generators.")
+    parser.add_argument("--cases", type = int, default = FUZZ_CASES, help = "number of random cases per engine")
+    parser.add_argument("--batch-size", type = int, default = 100, help = "number of cases per worker batch")
+    parser.add_argument("--processes", type = int, default = None, help = "number of worker processes (default: number of CPUs)")
+    parser.add_argument("--seed", type = int, default = None, help = "seed for reproducing a run (default: random)")
+    parser.add_argument("--solvers", nargs = "*", default = [engine for engine in SOLVER_ENGINES if engine not in KNOWN_DIVERGENT_ENGINES], help = f"solver engines to run (default: all but {', '.join(sorted(KNOWN_DIVERGENT_ENGINES))})")
+    parser.add_argument("--generators", nargs = "*", default = list(GENERATOR_ENGINES), help = "generator engines to run")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.getrandbits(32)
+    batches = [(seed + i, min(args.batch_size, args.cases - i * args.batch_size), args.solvers, args.generators, i == 0) for i in range(-(-args.cases // args.batch_size))]
+
+    started = time.perf_counter()
+
+    with Pool(args.processes) as pool:
+        failures = [failure for batch in pool.starmap(run_batch, batches) for failure in batch]
+
+    print(f"seed {seed}: {args.cases} cases x {len(args.solvers)} solvers + {len(args.generators)} generators in {time.perf_counter() - started:.1f}s, {len(failures)} failures")
+
+    for engine, description, path in failures:
+        print(f"{engine}: {description} (saved to {path})")
+
+    if failures:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+This file is a module for the game Automaze. It contains the registry of level generators which LevelGenerator.generate_level chooses from (LEVEL_GENERATOR in the config.py module): the original random noise generator plus a recursive backtracker, Wilson's algorithm, and a cellular automaton, the last three producing levels that are solvable by construction. All generators produce level arrays in the same cell codes (0 open, 1 wall, 2 start, 3 finish) and draw all random choices from the random number generator they are given, so levels stay reproducible from their level ID. It can be run on its own to benchmark the throughput of every generator, is imported into the Automaze level_generator.py and fuzz.py modules, and references the config.py and maze_features.py modules.
+"""
+
+from config import *
+from maze_features import neighbor_counts
+
+import random
+import time
+import numpy as np
+from scipy import ndimage
+
+GENERATORS = {}
+
+def register_generator(name):
+    """
+    Decorator which adds a generator function to GENERATORS under name. A generator function takes (width, height, rng, wall_percent), where rng is a random.Random instance, and returns the level array and the (y, x) coordinates of the start and finish cells.
+    """
+
+    def register(generator):
+        GENERATORS[name] = generator
+        return generator
+
+    return register
+
+def place_start_finish(level, rng):
+    """
+    Keeps only the largest connected area of open cells of a level array (walling in the rest, and opening the whole inside if fewer than 2 open cells remain) and places the start and finish cells at random distinct cells of it, so the level is solvable.
+
+    Parameters
+    ----------
+    level: array
+        2D numpy array of open (0) and wall (1) cells with border walls, modified in place
+    rng: object
+        random.Random instance
+
+    Returns
+    -------
+    level: array
+        The level array with start (2) and finish (3) cells
+    start: tuple
+        The (y, x) coordinates of the start cell
+    finish: tuple
+        The (y, x) coordinates of the finish cell
+
+    Raises
+    ------
+    ValueError
+        Raised when the inside of the level has fewer than 2 cells
+    """
+
+    if max(level.shape[0] - 2, 0) * max(level.shape[1] - 2, 0) < 2:
+        raise ValueError(f"a {level.shape[1]}x{level.shape[0]} level has no room for separate start and finish cells")
+
+    labels, number_areas = ndimage.label(level == 0, structure = np.ones((3, 3)))
+
+    if number_areas == 0 or np.bincount(labels.ravel())[1:].max() < 2:
+        level[1:-1, 1:-1] = 0
+        labels, number_areas = ndimage.label(level == 0, structure = np.ones((3, 3)))
+
+    largest = np.bincount(labels.ravel())[1:].argmax() + 1
+    level[(labels != largest) & (level == 0)] = 1
+
+    cells = [(int(y), int(x)) for y, x in np.argwhere(labels == largest)]
+    start = rng.choice(cells)
+    finish = rng.choice([cell for cell in cells if cell != start])
+
+    level[start] = 2
+    level[finish] = 3
+
+    return level, start, finish
+
+def lattice_neighbors(cell, width, height):
+    """
+    Returns the cells two steps up, down, left, and right of a cell which lie on the lattice of odd coordinates inside the border walls.
+    """
+
+    y, x = cell
+
+    return [(y + dy, x + dx) for dy, dx in [(-2, 0), (2, 0), (0, -2), (0, 2)] if 1 <= y + dy <= height - 2 and 1 <= x + dx <= width - 2]
+
+@register_generator("noise")
+def generate_noise(width, height, rng, wall_percent):
+    """
+    The original generator: random start and finish cells and independent random inner walls with likelihood wall_percent. Not solvable by construction, levels must be checked with LevelGenerator.check_connectivity or find_path.
+    """
+
+    if max(width-2, 0) * max(height-2, 0) < 2:
+        raise ValueError(f"a {width}x{height} level has no room for separate start and finish cells")
+
+    level = np.ones((height, width))
+    level[1:-1, 1:-1] = 0
+
+    start_x = rng.randint(1, width-2)
+    start_y = rng.randint(1, height-2)
+    finish_x = rng.randint(1, width-2)
+    finish_y = rng.randint(1, height-2)
+
+    while finish_x == start_x and finish_y == start_y:
+        finish_x = rng.randint(1, width-2)
+        finish_y = rng.randint(1, height-2)
+
+    level[start_y, start_x] = 2
+    level[finish_y, finish_x] = 3
+
+    starter_cells = [0, 1]
+
+    for y in range (1, height-1):
+        for x in range(1, width-1):
+            if level[y, x] == 0:
+                cell = rng.choices(starter_cells, weights = (100 - wall_percent, wall_percent), k = 1)
+                level[y, x] = cell[0]
+
+    return level, (start_y, start_x), (finish_y, finish_x)
+
+@register_generator("backtracker")
+def generate_backtracker(width, height, rng, wall_percent):
+    """
+    Recursive backtracker (randomized depth-first search, with an explicit stack) carving passages between the cells of the odd-coordinate lattice; produces a perfect maze with long winding corridors. wall_percent is not used.
+    """
+
+    level = np.ones((height, width))
+
+    cell = (rng.randrange(1, height - 1, 2), rng.randrange(1, width - 1, 2))
+    level[cell] = 0
+    stack = [cell]
+
+    while stack:
+        y, x = stack[-1]
+        unvisited = [neighbor for neighbor in lattice_neighbors((y, x), width, height) if level[neighbor] == 1]
+
+        if unvisited:
+            neighbor_y, neighbor_x = rng.choice(unvisited)
+            level[(y + neighbor_y) // 2, (x + neighbor_x) // 2] = 0
+            level[neighbor_y, neighbor_x] = 0
+            stack.append((neighbor_y, neighbor_x))
+
+        else:
+            stack.pop()
+
+    return place_start_finish(level, rng)
+
+@register_generator("wilson")
+def generate_wilson(width, height, rng, wall_percent):
+    """
+    Wilson's algorithm: loop-erased random walks from every lattice cell until they hit the maze carved so far; produces a uniformly random perfect maze with more short dead ends than the recursive backtracker. wall_percent is not used.
+    """
+
+    level = np.ones((height, width))
+
+    cells = [(y, x) for y in range(1, height - 1, 2) for x in range(1, width - 1, 2)]
+    rng.shuffle(cells)
+
+    in_maze = {cells[0]}
+    level[cells[0]] = 0
+
+    for cell in cells[1:]:
+        if cell in in_maze:
+            continue
+
+        # random walk until the maze is hit, remembering only the last exit from each cell, which erases loops
+        exits = {}
+        current = cell
+
+        while current not in in_maze:
+            exits[current] = rng.choice(lattice_neighbors(current, width, height))
+            current = exits[current]
+
+        current = cell
+
+        while current not in in_maze:
+            following = exits[current]
+            level[current] = 0
+            level[(current[0] + following[0]) // 2, (current[1] + following[1]) // 2] = 0
+            in_maze.add(current)
+            current = following
+
+    return place_start_finish(level, rng)
+
+@register_generator("cellular")
+def generate_cellular(width, height, rng, wall_percent):
+    """
+    Cellular automaton: random inner walls with likelihood wall_percent, smoothed CELLULAR_ITERATIONS times (a cell becomes a wall with 5 or more wall neighbors and opens with 3 or fewer, outside the level counting as wall), then reduced to its largest open area; produces open caves.
+    """
+
+    level = np.ones((height, width))
+    level[1:-1, 1:-1] = [[1 if rng.random() * 100 < wall_percent else 0 for x in range(width - 2)] for y in range(height - 2)]
+
+    for i in range(CELLULAR_ITERATIONS):
+        wall_neighbors = 8 - neighbor_counts(level == 0)
+        inside = level[1:-1, 1:-1]
+        inside[wall_neighbors[1:-1, 1:-1] >= 5] = 1
+        inside[wall_neighbors[1:-1, 1:-1] <= 3] = 0
+
+    return place_start_finish(level, rng)
+
+def benchmark(number_levels = 200, width = TILES_WIDE, height = TILES_HIGH):
+    """
+    Measures the throughput of every registered generator and prints it.
+
+    Parameters
+    ----------
+    number_levels: integer
+        The number of levels generated per generator
+    width: integer
+        The width of the level arrays
+    height: integer
+        The height of the level arrays
+
+    Returns
+    -------
+    dictionary
+        Levels generated per second, by generator name
+
+    Raises
+    ------
+    None
+    """
+
+    throughput = {}
+
+    for name, generator in GENERATORS.items():
+        rng = random.Random(0)
+        started = time.perf_counter()
+
+        for i in range(number_levels):
+            generator(width, height, rng, WALL_PERCENT)
+
+        throughput[name] = number_levels / (time.perf_counter() - started)
+        print(f"{name:>12}: {throughput[name]:10.1f} levels/s ({width}x{height})")
+
+    return throughput
+
+if __name__ == "__main__":
+    benchmark()
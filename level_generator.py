@@ -1,13 +1,156 @@
 """
-This file is a module for the game Automaze. It procedurally generates a random level as a 2D numpy array and ensures it is passable from start to finish and within the player's current difficulty level. It is imported into the Automaze main.py module and references the config.py module.
+This file is a module for the game Automaze. It procedurally generates a random level as a 2D numpy array and ensures it is passable from start to finish and within the player's current difficulty level. It also holds the level generation loop, with its time budget and fallbacks, shared by the game and the soak test (generate_validated_level). It is imported into the Automaze main.py and soak.py modules and references the config.py, maze_features.py, bitboard.py, generators.py, and dedup.py modules.
 """
 
 from config import *
+from maze_features import *
+from bitboard import Bitboard
+from generators import GENERATORS
+from dedup import level_fingerprint
 
 import numpy as np
 import pandas as pd
 import random
 import copy
+import time
+import logging
+from collections import deque
+from scipy import ndimage
+
+logger = logging.getLogger(__name__)
+
+def encode_level_id(seed, width, height, wall_percent, generator = "noise", version = GENERATOR_VERSION):
+    """
+    Packs everything required to rebuild a level into a compact level ID string of the form "version-widthxheight-wall_percent-seed", where the seed is written as 16 hexadecimal digits (64 bits). Levels made by a generator other than "noise" have the generator name inserted before the seed, "version-widthxheight-wall_percent-generator-seed". Called by LevelGenerator.generate_level.
+
+    Parameters
+    ----------
+    seed: integer
+        The 64-bit seed used to generate the level
+    width: integer
+        The width of the level array
+    height: integer
+        The height of the level array
+    wall_percent: integer
+        The likelihood in percent of an inner cell being a wall
+    generator: string
+        The name of the generator in the registry of the generators.py module, defaults to "noise"
+    version: integer
+        The level generator version the level was created with, defaults to GENERATOR_VERSION in the config.py module
+
+    Returns
+    -------
+    string
+        The level ID, e.g. "1-20x20-30-00c0ffee00c0ffee" or "1-20x20-30-wilson-00c0ffee00c0ffee"
+
+    Raises
+    ------
+    None
+    """
+
+    if generator == "noise":
+        return f"{version}-{width}x{height}-{wall_percent}-{seed:016x}"
+
+    return f"{version}-{width}x{height}-{wall_percent}-{generator}-{seed:016x}"
+
+def decode_level_id(level_id):
+    """
+    Unpacks a level ID created with encode_level_id. Called by LevelGenerator.from_level_id.
+
+    Parameters
+    ----------
+    level_id: string
+        The level ID, e.g. "1-20x20-30-00c0ffee00c0ffee" or "1-20x20-30-wilson-00c0ffee00c0ffee"
+
+    Returns
+    -------
+    tuple
+        Containing the seed, width, height, wall_percent, and version, all integers, and the generator name (string)
+
+    Raises
+    ------
+    ValueError
+        Raised when level_id is not of the form "version-widthxheight-wall_percent-seed" or "version-widthxheight-wall_percent-generator-seed"
+    """
+
+    try:
+        fields = level_id.split("-")
+
+        if len(fields) == 4:
+            fields.insert(3, "noise")
+
+        version, size, wall_percent, generator, seed = fields
+        width, height = size.split("x")
+
+        return int(seed, 16), int(width), int(height), int(wall_percent), int(version), generator
+
+    except (AttributeError, ValueError):
+        raise ValueError(f"invalid level ID {level_id!r}")
+
+def carve_cheapest_path(level, start, finish, border = 0):
+    """
+    Connects two cells of a level array by turning the fewest possible wall cells into open cells, found with a 0-1 breadth-first search in which entering an open cell costs nothing and entering a wall cell (coded 1) costs one. Vertical, horizontal, and diagonal movement are all possible. Called by LevelGenerator.repair_connectivity and by the chunks.py module.
+
+    Parameters
+    ----------
+    level: array
+        2D numpy array containing coded cells, modified in place
+    start: tuple
+        The (y, x) coordinates of the first cell
+    finish: tuple
+        The (y, x) coordinates of the second cell
+    border: integer
+        The number of outer rows and columns which are never carved or crossed, 1 to keep the border walls of a level
+
+    Returns
+    -------
+    integer
+        The number of wall cells turned into open cells
+
+    Raises
+    ------
+    None
+    """
+
+    cost = np.full(level.shape, np.iinfo(np.int32).max, dtype = np.int32)
+    parent = {}
+
+    cost[start] = 0
+    queue = deque([start])
+
+    while queue:
+        y, x = queue.popleft()
+
+        if (y, x) == finish:
+            break
+
+        for neighbor_y in range(y-1, y+2):
+            for neighbor_x in range(x-1, x+2):
+                if neighbor_y < border or neighbor_x < border or neighbor_y > level.shape[0] - 1 - border or neighbor_x > level.shape[1] - 1 - border:
+                    continue
+
+                step_cost = 1 if level[neighbor_y, neighbor_x] == 1 else 0
+
+                if cost[y, x] + step_cost < cost[neighbor_y, neighbor_x]:
+                    cost[neighbor_y, neighbor_x] = cost[y, x] + step_cost
+                    parent[(neighbor_y, neighbor_x)] = (y, x)
+
+                    if step_cost == 0:
+                        queue.appendleft((neighbor_y, neighbor_x))
+                    else:
+                        queue.append((neighbor_y, neighbor_x))
+
+    cells_carved = 0
+    y, x = finish
+
+    while (y, x) != start:
+        if level[y, x] == 1:
+            level[y, x] = 0
+            cells_carved = cells_carved + 1
+
+        y, x = parent[(y, x)]
+
+    return cells_carved
 
 class LevelGenerator():
     """
@@ -25,6 +168,8 @@ class LevelGenerator():
     5 == cell neighbors assessed from this cell already, marked with assessed "yes" in pathway_df
 
     Difficulty level settings are in the config.py module.
+
+    Every level is reproducible from its level ID (see encode_level_id), which records the generator version, the array size, the wall density, and the 64-bit seed of the random number generator used by generate_level; LevelGenerator.from_level_id rebuilds the exact array, start, and finish cells.
     """
 
     def __init__(self, width, height):
@@ -51,7 +196,7 @@ class LevelGenerator():
         self.width = width
         self.height = height
 
-        self.level_raw = np.ones((self.width, self.height))
+        self.level_raw = np.ones((self.height, self.width))
 
         self.start_x = 0
         self.start_y = 0
@@ -66,13 +211,94 @@ class LevelGenerator():
         self.min_number_steps = 0
         self.difficulty_validated = False
 
-    def generate_level(self):
+        self.connected = False
+        self.cells_carved = 0
+        self.features = None
+
+        self.wall_percent = WALL_PERCENT
+        self.generator = LEVEL_GENERATOR
+        self.seed = None
+        self.level_id = None
+        self.rng = random.Random()
+
+    @classmethod
+    def from_level_id(cls, level_id):
         """
-        Generates a 2D numpy array of height and width (as provided in __init__) to serve as a level map; includes border walls, randomized internal walls, and randomly-identified start and finish cells.
+        Instantiates a LevelGenerator and rebuilds the exact level array, start, and finish cells identified by level_id. repair_connectivity is always called: it is deterministic and leaves levels that were already connected untouched, so levels that were repaired when first generated are rebuilt with the same carved cells. Note that find_path is not called, the minimum number of steps must be recalculated if required.
 
         Parameters
         ----------
-        None
+        level_id: string
+            The level ID, as created by generate_level (see encode_level_id)
+
+        Returns
+        -------
+        new_level: object
+            LevelGenerator instance whose level_raw, start, and finish cells match the level identified by level_id
+
+        Raises
+        ------
+        ValueError
+            Raised when level_id is malformed, was created with a different generator version, or with a generator which is not registered
+        """
+
+        seed, width, height, wall_percent, version, generator = decode_level_id(level_id)
+
+        if version != GENERATOR_VERSION:
+            raise ValueError(f"level ID {level_id!r} was created with generator version {version}, this is version {GENERATOR_VERSION}")
+
+        if generator not in GENERATORS:
+            raise ValueError(f"level ID {level_id!r} was created with unknown generator {generator!r}")
+
+        new_level = cls(width, height)
+        new_level.wall_percent = wall_percent
+        new_level.generator = generator
+        new_level.generate_level(seed)
+        new_level.repair_connectivity()
+
+        return new_level
+
+    @classmethod
+    def from_array(cls, level_raw):
+        """
+        Instantiates a LevelGenerator for an existing level array, e.g. one loaded from disk or created by hand, taking the start and finish cells from their cell codes. The level has no level ID.
+
+        Parameters
+        ----------
+        level_raw: array
+            2D numpy array containing coded cells, with exactly one start cell (2) and one finish cell (3)
+
+        Returns
+        -------
+        new_level: object
+            LevelGenerator instance on which find_path, check_connectivity, and validate_difficulty can be called
+
+        Raises
+        ------
+        ValueError
+            Raised when level_raw does not contain exactly one start and one finish cell
+        """
+
+        level_raw = np.asarray(level_raw, dtype = float)
+
+        if np.count_nonzero(level_raw == 2) != 1 or np.count_nonzero(level_raw == 3) != 1:
+            raise ValueError("level array must contain exactly one start cell (2) and one finish cell (3)")
+
+        new_level = cls(level_raw.shape[1], level_raw.shape[0])
+        new_level.level_raw = level_raw.copy()
+        new_level.start_y, new_level.start_x = [int(i) for i in np.argwhere(level_raw == 2)[0]]
+        new_level.finish_y, new_level.finish_x = [int(i) for i in np.argwhere(level_raw == 3)[0]]
+
+        return new_level
+
+    def generate_level(self, seed = None):
+        """
+        Generates a 2D numpy array of height and width (as provided in __init__) to serve as a level map; includes border walls, randomized internal walls, and randomly-identified start and finish cells. The level is made by the generator named self.generator (defaults to LEVEL_GENERATOR in the config.py module) from the registry in the generators.py module. All random choices are drawn from a random number generator seeded with seed, so the same seed always produces the same level.
+
+        Parameters
+        ----------
+        seed: integer
+            Optional, the 64-bit seed for the level; a new one is drawn from the global random state if not provided
 
         Returns
         -------
@@ -83,12 +309,16 @@ class LevelGenerator():
         self.start_y: integer
             Randomly selected inside array walls, the y coordinate of the start cell (where the player begins in the level)
         self.finish_x: integer
-            Randomly selected inside array walls, the x coordinate of the target cell (where the player is trying to get to in the level)
+            Randomly selected inside array walls and never the same cell as the start cell, the x coordinate of the target cell (where the player is trying to get to in the level)
         self.finish_y: integer
-            Randomly selected inside array walls, the y coordinate of the target cell (where the player is trying to get to in the level)
+            Randomly selected inside array walls and never the same cell as the start cell, the y coordinate of the target cell (where the player is trying to get to in the level)
+
+        Also sets self.seed and self.level_id (see encode_level_id). The errors below are those of the "noise" generator.
 
         Raises
         ------
+        ValueError: a 3x3 level has no room for separate start and finish cells
+            Raised when width and height provided at class instantiation are both 3
         ValueError: empty range for randrange() (1, n, 0)
             Raised when width or height provided at class instantiation is 2
         ValueError: empty range for randrange() (1, n, -1)
@@ -99,26 +329,14 @@ class LevelGenerator():
             Raised when width or height provided at class instantiation is a float
         """
 
-        self.level_raw[1:-1, 1:-1] = 0
-
-        self.start_x = random.randint(1, self.width-2)
-        self.start_y = random.randint(1, self.height-2)
-        self.finish_x = random.randint(1, self.width-2)
-        self.finish_y = random.randint(1, self.height-2)
-
-        self.level_raw[self.start_y, self.start_x] = 2
-        self.level_raw[self.finish_y, self.finish_x] = 3
+        if seed is None:
+            seed = random.getrandbits(64)
 
-        starter_cells = [0, 1]
+        self.seed = seed
+        self.level_id = encode_level_id(self.seed, self.width, self.height, self.wall_percent, self.generator)
+        self.rng = random.Random(self.seed)
 
-        for y in range (1, self.height-1):
-            for x in range(1, self.width-1):
-                if self.level_raw[y, x] == 0:
-                    cell = random.choices(starter_cells, weights = (70, 30), k = 1)
-                    self.level_raw[y, x] = cell[0]
-
-                else:
-                    pass
+        self.level_raw, (self.start_y, self.start_x), (self.finish_y, self.finish_x) = GENERATORS[self.generator](self.width, self.height, self.rng, self.wall_percent)
 
         return self.level_raw, self.start_x, self.start_y, self.finish_x, self.finish_y
     
@@ -230,9 +448,120 @@ class LevelGenerator():
             except:
                 return self.path_found, self.min_number_steps, self.pathway_df
 
+    def find_path_bitboard(self, max_steps = None):
+        """
+        Determines if there is a path along open cells from the start to finish cells and, if so, what the minimum number of steps required to reach it is, with the same movement rules as find_path but using a bitboard wavefront search (see the bitboard.py module) which costs a few integer operations per step instead of a dataframe update per cell. The result is always the true minimum, unless max_steps is given and the minimum is above it, in which case the search stops early.
+
+        Parameters
+        ----------
+        max_steps: integer
+            Optional, the number of steps beyond which the search gives up (see Bitboard.min_steps in the bitboard.py module), None for a full search
+
+        Returns
+        -------
+        self.path_found: boolean or None
+            Returns True when a path can be found from the start to finish cells, False when it cannot be, and None when the search gave up because the minimum number of steps is above max_steps
+        self.min_number_steps: integer
+            The minimum number of steps required to get from the start coordinates to the target coordinates; only meaningful if path found, max_steps + 1 if the search gave up
+
+        Raises
+        ------
+        None
+        """
+
+        self.path_found, self.min_number_steps = Bitboard(self.level_raw).min_steps(max_steps)
+
+        return self.path_found, self.min_number_steps
+
+    def solve(self, player_difficulty = None):
+        """
+        Calls find_path or find_path_bitboard, depending on SOLVER_BACKEND in the config.py module ("dataframe" or "bitboard"). Called by generate_validated_level. If player_difficulty is given, the bitboard search is bounded by the upper end of its band of steps (see difficulty_band in the config.py module), so levels too long for the difficulty setting are given up on as soon as that is certain rather than solved in full; levels that are too short always finish early anyway. The difficulty score (USE_FEATURE_SCORE in the config.py module) is never below the minimum number of steps as long as DIFFICULTY_FEATURE_WEIGHTS are not negative, so the bound holds for it as well.
+
+        Parameters
+        ----------
+        player_difficulty: string
+            Optional, the player's current difficulty setting, expressed as "Level n" where n is between 1 (easiest) and 4 (hardest)
+
+        Returns
+        -------
+        self.path_found: boolean or None
+            Returns True when a path can be found from the start to finish cells, False when it cannot be, and None when a bounded search gave up
+        self.min_number_steps: integer
+            The minimum number of steps required to get from the start coordinates to the target coordinates
+
+        Raises
+        ------
+        ValueError
+            Raised when SOLVER_BACKEND is neither "dataframe" nor "bitboard"
+        """
+
+        if SOLVER_BACKEND == "bitboard":
+            self.find_path_bitboard(difficulty_band(player_difficulty)[1] if player_difficulty is not None else None)
+
+        elif SOLVER_BACKEND == "dataframe":
+            self.find_path()
+
+        else:
+            raise ValueError(f"unknown SOLVER_BACKEND {SOLVER_BACKEND!r}")
+
+        return self.path_found, self.min_number_steps
+
+    def check_connectivity(self):
+        """
+        Determines if the start and finish cells are connected along open cells by labelling the connected components of the level array in a single vectorized pass (scipy.ndimage.label), allowing the same vertical, horizontal, and diagonal movement as find_path. This is much cheaper than find_path and so can be used to discard levels before it is called.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        self.connected: boolean
+            Returns True when the start and finish cells are in the same component and False when they are not
+
+        Raises
+        ------
+        None
+        """
+
+        labels = ndimage.label(self.level_raw != 1, structure = np.ones((3, 3)))[0]
+        self.connected = bool(labels[self.start_y, self.start_x] == labels[self.finish_y, self.finish_x])
+
+        return self.connected
+
+    def repair_connectivity(self):
+        """
+        Joins the components of the start and finish cells by turning the fewest possible inner wall cells into open cells (see carve_cheapest_path). Border walls are never carved. Does nothing when the start and finish cells are already connected.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        self.cells_carved: integer
+            The number of wall cells turned into open cells
+        self.connected: boolean
+            Always True once the repair is done
+
+        Raises
+        ------
+        None
+        """
+
+        self.cells_carved = 0
+
+        if self.check_connectivity():
+            return self.cells_carved, self.connected
+
+        self.cells_carved = carve_cheapest_path(self.level_raw, (self.start_y, self.start_x), (self.finish_y, self.finish_x), border = 1)
+        self.connected = True
+
+        return self.cells_carved, self.connected
+
     def validate_difficulty(self, player_difficulty):
         """
-        Checks that the minimum number of steps for the level generated is appropriate for the player's current difficulty level, by calling the function difficulty_scale from the config.py module.
+        Checks that the minimum number of steps for the level generated is appropriate for the player's current difficulty level, by calling the function difficulty_scale from the config.py module. If USE_FEATURE_SCORE is set in the config.py module, the maze complexity features of the level are extracted first and the richer difficulty_score from the maze_features.py module is graded instead. Levels on which a bounded solve gave up (path_found is None) are too long and rejected without extracting features.
 
         Parameters
         ----------
@@ -243,6 +572,8 @@ class LevelGenerator():
         -------
         self.difficulty_validated: boolean
             Returns True when minimum number of steps for the level is appropriate for the player's current difficulty setting and False when it is not
+        self.features: series
+            The maze complexity features of the level (see extract_features in the maze_features.py module), only set if USE_FEATURE_SCORE is set
 
         Raises
         ------
@@ -250,8 +581,223 @@ class LevelGenerator():
         """
 
         self.difficulty_validated = False
+        score = self.min_number_steps
 
-        if difficulty_scale(self.min_number_steps) == player_difficulty:
+        if self.path_found is None:
+            return self.difficulty_validated
+
+        if USE_FEATURE_SCORE:
+            self.features = extract_features(self.level_raw).iloc[0]
+            score = difficulty_score(self.features, self.min_number_steps)
+
+        if difficulty_scale(score) == player_difficulty:
             self.difficulty_validated = True
 
-        return self.difficulty_validated
\ No newline at end of file
+        return self.difficulty_validated
+
+def evaluate_candidate(level, player_difficulty, density_controller, seen_levels = None, deadline = None):
+    """
+    Generates one candidate level with the tier's wall density from density_controller (see the density_controller.py module) and grades it into one of the outcomes of DensityController. Candidates whose start and finish cells are not connected are repaired with LevelGenerator.repair_connectivity if REPAIR_DISCONNECTED_LEVELS is set in the config.py module and discarded otherwise, and candidates are solved with LevelGenerator.solve, which gives up on levels as soon as they are certain to be too long for the difficulty setting. If REJECT_SEEN_LEVELS is set in the config.py module, accepted levels whose fingerprint is in seen_levels (see the dedup.py module) are graded as repeats. The deadline is checked before each stage that can take a while (repair, solve, and validation), so a slow candidate overruns it by at most one stage.
+
+    Parameters
+    ----------
+    level: object
+        LevelGenerator instance, regenerated in place
+    player_difficulty: string
+        The player's current difficulty setting, expressed as "Level n" where n is between 1 (easiest) and 4 (hardest)
+    density_controller: object
+        DensityController instance (see the density_controller.py module)
+    seen_levels: object
+        Optional, SeenLevels instance of the levels the player has been served (see the dedup.py module)
+    deadline: float
+        Optional, the time.perf_counter() value after which the candidate is abandoned
+
+    Returns
+    -------
+    string or None
+        The outcome, None if the deadline passed before the candidate was graded
+
+    Raises
+    ------
+    None
+    """
+
+    level.wall_percent = density_controller.parameters(player_difficulty)[0]
+    level.generate_level()
+    level.path_found = False
+    level.difficulty_validated = False
+
+    outcome = density_controller.screen(level, player_difficulty)
+
+    if outcome is not None:
+        return outcome
+
+    if level.check_connectivity() == False:
+        if not REPAIR_DISCONNECTED_LEVELS:
+            return "no_path"
+
+        if deadline is not None and time.perf_counter() >= deadline:
+            return None
+
+        level.repair_connectivity()
+
+    if deadline is not None and time.perf_counter() >= deadline:
+        return None
+
+    level.solve(player_difficulty)
+
+    if deadline is not None and time.perf_counter() >= deadline:
+        return None
+
+    level.validate_difficulty(player_difficulty)
+    outcome = density_controller.classify(level, player_difficulty)
+
+    if outcome == "accepted" and REJECT_SEEN_LEVELS and seen_levels is not None and level_fingerprint(level.level_raw) in seen_levels:
+        level.difficulty_validated = False
+        outcome = "repeat"
+
+    return outcome
+
+def generate_validated_level(player_difficulty, density_controller, seen_levels = None, level_cache = None, time_budget = GENERATION_TIME_BUDGET, width = TILES_WIDE, height = TILES_HIGH):
+    """
+    Generates candidate levels with evaluate_candidate until one is solvable and within the player's difficulty setting, the level generation loop shared by Game.generate_new_level in the main.py module and the soak test (see the soak.py module). density_controller is told the outcome of every candidate level (see the density_controller.py module), and the fingerprint of the level returned is added to seen_levels (see the dedup.py module).
+
+    Generation stops once time_budget seconds have passed without a level being accepted, checked inside each candidate as well as after it, and fallback_level provides the level instead. The closest candidate so far is kept for it, ranked by how far its minimum number of steps lies outside the band of the difficulty setting (see difficulty_distance in the config.py module); candidates on which the bounded solve gave up are ranked by the lower bound it reports, and with REJECT_SEEN_LEVELS set in the config.py module repeats are never kept. Every accepted level is copied into level_cache under the difficulty setting. Every generation is logged at debug level with its duration and number of candidates, and every overrun of the budget and every fallback as a warning, so the latency of level transitions can be monitored.
+
+    Parameters
+    ----------
+    player_difficulty: string
+        The player's current difficulty setting, expressed as "Level n" where n is between 1 (easiest) and 4 (hardest)
+    density_controller: object
+        DensityController instance (see the density_controller.py module)
+    seen_levels: object
+        Optional, SeenLevels instance of the levels the player has been served (see the dedup.py module)
+    level_cache: dictionary
+        Optional, the last level accepted per difficulty setting, updated in place
+    time_budget: float
+        The time in seconds after which generation falls back, defaults to GENERATION_TIME_BUDGET in the config.py module
+    width: integer
+        The width of the level array, defaults to TILES_WIDE in the config.py module
+    height: integer
+        The height of the level array, defaults to TILES_HIGH in the config.py module
+
+    Returns
+    -------
+    object
+        LevelGenerator instance of the level, solved
+
+    Raises
+    ------
+    None
+    """
+
+    new_level = LevelGenerator(width, height)
+    generation_started = time.perf_counter()
+    deadline = generation_started + time_budget
+    number_candidates = 0
+    closest = None
+
+    while new_level.path_found == False or new_level.difficulty_validated == False:
+        started = time.perf_counter()
+        number_candidates = number_candidates + 1
+
+        outcome = evaluate_candidate(new_level, player_difficulty, density_controller, seen_levels, deadline)
+
+        if outcome is None:
+            new_level = fallback_level(player_difficulty, closest, level_cache, seen_levels, number_candidates, time_budget, width, height)
+            break
+
+        density_controller.record(player_difficulty, outcome, time.perf_counter() - started)
+
+        if outcome != "accepted":
+            # closest candidate so far by exact or (where the bounded solve gave up) lowest possible number of steps, exact ones first on a tie
+            if new_level.path_found != False and not (outcome == "repeat" and REJECT_SEEN_LEVELS):
+                rank = (difficulty_distance(new_level.min_number_steps, player_difficulty), new_level.path_found is None)
+
+                if closest is None or rank < closest_rank:
+                    closest = copy.copy(new_level)
+                    closest.level_raw = new_level.level_raw.copy()
+                    closest_rank = rank
+
+            if time.perf_counter() >= deadline:
+                new_level = fallback_level(player_difficulty, closest, level_cache, seen_levels, number_candidates, time_budget, width, height)
+                break
+
+    else:
+        if level_cache is not None:
+            level_cache[player_difficulty] = copy.copy(new_level)
+            level_cache[player_difficulty].level_raw = new_level.level_raw.copy()
+
+    elapsed = time.perf_counter() - generation_started
+
+    if elapsed > time_budget:
+        logger.warning("level generation for %s overran its %.0f ms budget: %.1f ms, %d candidates", player_difficulty, time_budget * 1000, elapsed * 1000, number_candidates)
+
+    logger.debug("generated level %s for %s in %.1f ms, %d candidates", new_level.level_id, player_difficulty, elapsed * 1000, number_candidates)
+
+    if seen_levels is not None:
+        seen_levels.add(level_fingerprint(new_level.level_raw))
+
+    return new_level
+
+def fallback_level(player_difficulty, closest, level_cache, seen_levels, number_candidates, time_budget, width = TILES_WIDE, height = TILES_HIGH):
+    """
+    Provides a level when generate_validated_level runs out of time, in order of preference: the candidate whose minimum number of steps was closest to the band of the player's difficulty setting (solved in full if the bounded solve gave up on it), a copy of the last level accepted for the difficulty setting unless REJECT_SEEN_LEVELS is set in the config.py module and its fingerprint is in seen_levels, or a level of the GENERATION_FALLBACK_GENERATOR generator (see the generators.py module), which is solvable by construction. The level last accepted has always been served already, so with REJECT_SEEN_LEVELS set it is only used when seen_levels is not given. The fallback is logged as a warning.
+
+    Parameters
+    ----------
+    player_difficulty: string
+        The player's current difficulty setting, expressed as "Level n" where n is between 1 (easiest) and 4 (hardest)
+    closest: object
+        LevelGenerator instance of the closest candidate, None if no candidate had a path
+    level_cache: dictionary
+        The last level accepted per difficulty setting, None for none
+    seen_levels: object
+        SeenLevels instance of the levels the player has been served (see the dedup.py module), None for none
+    number_candidates: integer
+        The number of candidates generated, for the log
+    time_budget: float
+        The time budget in seconds, for the log
+    width: integer
+        The width of the level array, defaults to TILES_WIDE in the config.py module
+    height: integer
+        The height of the level array, defaults to TILES_HIGH in the config.py module
+
+    Returns
+    -------
+    object
+        LevelGenerator instance of the level to use, solved
+
+    Raises
+    ------
+    None
+    """
+
+    cached = level_cache.get(player_difficulty) if level_cache is not None else None
+
+    if cached is not None and REJECT_SEEN_LEVELS and seen_levels is not None and level_fingerprint(cached.level_raw) in seen_levels:
+        cached = None
+
+    if closest is not None:
+        level = closest
+
+        if level.path_found is None:
+            level.solve()
+
+        source = f"closest candidate ({level.min_number_steps} steps)"
+
+    elif cached is not None:
+        level = copy.copy(cached)
+        level.level_raw = level.level_raw.copy()
+        source = "cached level"
+
+    else:
+        level = LevelGenerator(width, height)
+        level.generator = GENERATION_FALLBACK_GENERATOR
+        level.generate_level()
+        level.solve()
+        source = f"{GENERATION_FALLBACK_GENERATOR} level ({level.min_number_steps} steps)"
+
+    logger.warning("no level accepted for %s within %.0f ms (%d candidates), falling back to %s %s", player_difficulty, time_budget * 1000, number_candidates, source, level.level_id)
+
+    return level
\ No newline at end of file
@@ -1,21 +1,37 @@
 """
-This file is a module for the game Automaze. It procedurally generates a random level as a 2D numpy array and ensures it is passable from start to finish and within the player's current difficulty level. It references the config.py, level_generator.py, rooms.py, and sprites.py modules.
+This file is a module for the game Automaze. It procedurally generates a random level as a 2D numpy array and ensures it is passable from start to finish and within the player's current difficulty level. It references the config.py, level_generator.py, agents.py, dedup.py, density_controller.py, chunks.py, thumbnails.py, player_history.py, snapshot.py, dynamic_maze.py, maze_features.py, rooms.py, and sprites.py modules.
 """
 
 from config import *
 from level_generator import *
+from agents import *
+from dedup import *
+from density_controller import *
+from chunks import *
+from thumbnails import *
+from player_history import *
+from snapshot import *
+from dynamic_maze import *
+from maze_features import *
 from sprites import *
 from rooms import *
 
 import arcade
+import pyglet
 import numpy as np
 import pandas as pd
 from datetime import datetime as dt
+import time
+import random
+import logging
+from PIL import Image
 
 min_number_steps_global = 0
 player_number_steps_global = 0
 player_difficulty_global = "Level 1"
 iteration_global = 0
+level_grid_global = None
+preview_texture = None
 
 class Game(arcade.Window):
     """
@@ -31,9 +47,9 @@ class Game(arcade.Window):
 
     """
 
-    def __init__(self, width, height, title):
+    def __init__(self, width, height, title, visible = True, username = USERNAME, player_history_file = PLAYER_HISTORY_FILE, snapshot_file = SNAPSHOT_FILE, density_controller_file = DENSITY_CONTROLLER_FILE, player_stats_file = None):
         """
-        Initializes class instance.
+        Initializes class instance. A returning player (USERNAME in the config.py module) resumes at the difficulty setting and maze number where they left off, looked up in self.player_history (see the player_history.py module). If RESUME_FROM_SNAPSHOT is set in the config.py module and the player closed the window mid-session, self.snapshot holds the saved session (see the snapshot.py module), which self.setup resumes instead of generating a new level. Every file the player's data is read from and written to can be given, so the soak test (see the soak.py module) never touches the player_stats directory.
 
         Parameters
         ----------
@@ -43,6 +59,18 @@ class Game(arcade.Window):
             The height of the game window in pixels
         title: string
             The title of game as it should appear on the window title bar
+        visible: boolean
+            Whether the window is shown, False for the soak test (see the soak.py module)
+        username: string
+            The player's username, defaults to USERNAME in the config.py module
+        player_history_file: string
+            The player history database (see the player_history.py module), defaults to PLAYER_HISTORY_FILE in the config.py module
+        snapshot_file: string
+            The session snapshot file (see the snapshot.py module), defaults to SNAPSHOT_FILE in the config.py module
+        density_controller_file: string
+            The density controller file (see the density_controller.py module), defaults to DENSITY_CONTROLLER_FILE in the config.py module
+        player_stats_file: string
+            Optional, the session .csv file (see SessionStats in the player_history.py module), defaults to one named after the username and start time in the ./player_stats directory
 
         Returns
         -------
@@ -54,9 +82,11 @@ class Game(arcade.Window):
 
         """
 
-        super().__init__(width, height, title)
+        super().__init__(width, height, title, visible = visible, update_rate = UPDATE_RATE)
         self.current_room = 0
         self.rooms = []
+        self.redraw_frames = REDRAW_FRAMES
+        self.idle = False
 
         self.left_pressed = False
         self.right_pressed = False
@@ -65,12 +95,42 @@ class Game(arcade.Window):
 
         self.min_number_steps = 0
         self.player_number_steps = 0
+        self.level_id = None
+        self.level_features = None
 
         self.running = False
         self.iteration = 1
-        self.player_stats = pd.DataFrame(columns=["timestamp", "username", "iteration", "difficulty", "MNS", "PNS", "completed"])
         self.player_difficulty = "Level 1"
 
+        self.username = username
+        self.player_history = PlayerHistory(player_history_file)
+        last_session = self.player_history.last_session(self.username)
+
+        if last_session is not None:
+            self.player_difficulty, self.iteration = last_session
+
+        self.snapshot_file = snapshot_file
+        self.snapshot = read_snapshot(self.username, self.snapshot_file) if RESUME_FROM_SNAPSHOT and not ENDLESS_MODE else None
+
+        if self.snapshot is not None:
+            self.player_difficulty = self.snapshot["player_difficulty"]
+            self.iteration = self.snapshot["iteration"]
+
+        self.player_stats = SessionStats(player_stats_file or f"./player_stats/player_stats_{self.username}_{dt.now().strftime('%Y%m%d%H%M')}.csv", self.snapshot["stats_rows"] if self.snapshot is not None else None)
+        self.seen_levels = self.player_history.load_seen_levels(self.username)
+        self.level_cache = {}
+        self.density_controller = DensityController(density_controller_file)
+
+        self.endless_maze = ChunkedMaze() if ENDLESS_MODE else None
+
+        self.planner = None
+        self.dynamic_timer = 0
+        self.agents = None
+        self.agent_timer = 0
+        self.remaining_steps = 0
+        self.world_x = 0
+        self.world_y = 0
+
         self.new_y_coordinates = 0
         self.new_x_coordinates = 0
         self.new_y = 0
@@ -100,7 +160,7 @@ class Game(arcade.Window):
     
     def setup(self):
         """
-        Replaces the rooms list with newly setup rooms (aka pages and level), triggers new level generation, and resets self.player_number_steps for next maze level.
+        Replaces the rooms list with a newly setup level and the pages of the previous rooms list (set up on the first call, with their text updated on later calls), triggers new level generation, and resets self.player_number_steps for next maze level. If self.snapshot holds a saved session, its level is set up instead and the player is put straight back into it where they left off (see self.resume_snapshot).
 
         Parameters
         ----------
@@ -124,40 +184,124 @@ class Game(arcade.Window):
         global player_difficulty_global
         global iteration_global
         
+        # the pages are set up once and only their text is updated for every level (see setup_finish_level)
+        pages = self.rooms
         self.rooms = []
 
-        self.generate_new_level()
+        if self.snapshot is not None:
+            self.resume_snapshot()
 
-        room = setup_intro()
+        else:
+            self.generate_new_level()
+
+        room = pages[0] if pages else setup_intro()
         self.rooms.append(room)
 
         room = setup_level(self.map_grid)
         self.rooms.append(room)
         
-        room = setup_finish_level()
+        room = setup_finish_level(pages[2] if pages else None)
         self.rooms.append(room)
 
-        room = setup_finish_game()
+        room = setup_finish_game(pages[3] if pages else None)
         self.rooms.append(room)
 
         self.player_number_steps = 0
 
+        if self.snapshot is not None:
+            self.current_room = 1
+            self.player_number_steps = self.snapshot["player_number_steps"]
+            self.place_player(*self.snapshot["player"])
+            self.snapshot = None
+
+        self.mark_dirty()
+
         return self.rooms, self.player_number_steps
 
-    def generate_new_level(self):
+    def resume_snapshot(self):
         """
-        Generates and validates a new level array and records the minimum number of steps required to travel from the start to finish cells by instantiating a LevelGenerator and calling its functions (see the level_generator.py module for more information).
+        Takes the level of self.snapshot (see the snapshot.py module) in place of a newly generated one, setting up self.planner and self.agents for it as self.generate_new_level would. Called by self.setup.
 
         Parameters
         ----------
         None
 
+        Returns
+        -------
+        self.map_grid: array
+            2D numpy array containing coded cells, as saved
+        self.min_number_steps: integer
+            The minimum number of steps for the level, as saved
+        self.level_id: string
+            The level ID, as saved
+
+        Raises
+        ------
+        None
+
+        """
+
+        self.map_grid = self.snapshot["map_grid"]
+        self.min_number_steps = self.snapshot["min_number_steps"]
+        self.level_id = self.snapshot["level_id"]
+        self.level_features = extract_features(self.map_grid).iloc[0]
+
+        if DYNAMIC_MAZE:
+            self.planner = DStarLite(self.map_grid, self.snapshot["player"], tuple(np.argwhere(self.map_grid == 3)[0]))
+            self.remaining_steps = self.planner.distance()
+            self.dynamic_timer = 0
+
+        if AGENT_COUNT > 0:
+            self.agents = Agents(self.map_grid)
+            self.agent_timer = 0
+
+        return self.map_grid, self.min_number_steps, self.level_id
+
+    def save_snapshot(self):
+        """
+        Writes the current session to the snapshot file (see the snapshot.py module): the level, the player's cell and steps taken, the minimum number of steps, difficulty setting, maze number, level ID, and the rows of self.player_stats not yet written to .csv. Called on every level transition and when the window is closed; does nothing in endless mode, whose levels are never stored.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        integer
+            The size of the snapshot in bytes, 0 if none was written
+
+        Raises
+        ------
+        None
+
+        """
+
+        if not RESUME_FROM_SNAPSHOT or self.endless_maze is not None or not self.rooms:
+            return 0
+
+        player = (TILES_HIGH - int((self.rooms[1].player_sprite.center_y - TILE_SIZE/2 - VERTICAL_MARGIN) / TILE_SIZE) - 1, int((self.rooms[1].player_sprite.center_x - TILE_SIZE/2 - HORIZONTAL_MARGIN) / TILE_SIZE))
+
+        return write_snapshot(self.username, self.map_grid, player, self.player_number_steps, self.min_number_steps, self.player_difficulty, self.iteration, self.level_id, self.player_stats.pending, self.snapshot_file)
+
+    def generate_new_level(self, time_budget = GENERATION_TIME_BUDGET):
+        """
+        Generates and validates a new level array with generate_validated_level (see the level_generator.py module for more information) and records the minimum number of steps required to travel from the start to finish cells. Wall density and start/finish separation are taken from self.density_controller, which is told the outcome of every candidate level and saved when the game ends (see the density_controller.py module for more information). If REJECT_SEEN_LEVELS is set in the config.py module, levels the player has been served before, or a mirror image or rotation of them, are rejected in constant time by looking up their fingerprint in self.seen_levels (see the dedup.py module), which is saved with self.player_history once the level served is added to it. Generation stops once time_budget seconds have passed without a level being accepted, and the closest candidate, the level last accepted for the difficulty setting (kept in self.level_cache), or a fallback level is used instead. In dynamic maze mode (DYNAMIC_MAZE in the config.py module) self.planner is set up for the new level (see the dynamic_maze.py module), and if AGENT_COUNT in the config.py module is above 0 so are self.agents (see the agents.py module). In endless mode (ENDLESS_MODE in the config.py module) no level is generated, self.map_grid is instead the window of self.endless_maze around the player (see self.load_endless_window).
+
+        Parameters
+        ----------
+        time_budget: float
+            The time in seconds after which generation falls back to the closest candidate or a cached or fallback level, defaults to GENERATION_TIME_BUDGET in the config.py module
+
         Returns
         -------
         self.map_grid: array
             2D numpy array containing coded cells, derived from LevelGenerator.generate_level (see level_generator.py module for codes)
         self.min_number_steps: integer
             The minimum number of steps to travel from the start to finish cells, derived from LevelGenerator.find_path
+        self.level_id: string
+            The compact ID from which the level can be rebuilt exactly with LevelGenerator.from_level_id, recorded in self.player_stats
+        self.level_features: series
+            The maze complexity features of the level (see the maze_features.py module), stored in self.player_history next to the player performance rows
 
         Raises
         ------
@@ -165,24 +309,90 @@ class Game(arcade.Window):
 
         """
 
-        new_level = LevelGenerator(TILES_WIDE, TILES_HIGH)
-        new_level.generate_level()
-        new_level.find_path()
-        new_level.validate_difficulty(self.player_difficulty)
+        if self.endless_maze is not None:
+            self.min_number_steps = 0
+            self.level_id = None
 
-        while new_level.path_found == False or new_level.difficulty_validated == False:
-            new_level.generate_level()
-            new_level.find_path()
-            new_level.validate_difficulty(self.player_difficulty)
+            return self.load_endless_window(), self.min_number_steps, self.level_id
+
+        new_level = generate_validated_level(self.player_difficulty, self.density_controller, self.seen_levels, self.level_cache, time_budget)
 
         self.map_grid = new_level.level_raw
         self.min_number_steps = new_level.min_number_steps
+        self.level_id = new_level.level_id
+        self.level_features = new_level.features if new_level.features is not None else extract_features(self.map_grid).iloc[0]
+
+        self.player_history.save_seen_levels(self.username, self.seen_levels)
+
+        if DYNAMIC_MAZE:
+            self.planner = DStarLite(self.map_grid, (new_level.start_y, new_level.start_x), (new_level.finish_y, new_level.finish_x))
+            self.remaining_steps = self.planner.distance()
+            self.dynamic_timer = 0
+
+        if AGENT_COUNT > 0:
+            self.agents = Agents(self.map_grid)
+            self.agent_timer = 0
+
+        return self.map_grid, self.min_number_steps, self.level_id
+
+    def load_endless_window(self):
+        """
+        Endless mode only, replaces self.map_grid with the TILES_WIDE x TILES_HIGH window of self.endless_maze centered on the player's world coordinates (assembled across chunk borders by ChunkedMaze.get_window, see the chunks.py module), with the player's cell coded as the start cell so setup_level places the player sprite there. Also queues the chunks around the player for background generation.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        self.map_grid: array
+            2D numpy array containing coded cells for the part of the endless maze currently on screen
+
+        Raises
+        ------
+        None
+
+        """
+
+        self.endless_maze.update_player(self.world_x, self.world_y)
+
+        self.map_grid = self.endless_maze.get_window(self.world_x - TILES_WIDE // 2, self.world_y - TILES_HIGH // 2, TILES_WIDE, TILES_HIGH)
+        self.map_grid[TILES_HIGH // 2, TILES_WIDE // 2] = 2
+
+        return self.map_grid
+
+    def mark_dirty(self):
+        """
+        Asks for the window to be redrawn on the next REDRAW_FRAMES frames (see the config.py module) and, if the game was idle, returns the update rate to UPDATE_RATE and schedules the redraws of pyglet's event loop again. Called after input, room changes, level setup, wall changes, and when the window is resized, shown, or exposed.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        self.redraw_frames: integer
+            The number of frames still to be redrawn
+
+        Raises
+        ------
+        None
+
+        """
 
-        return self.map_grid, self.min_number_steps
+        self.redraw_frames = REDRAW_FRAMES
+
+        if self.idle:
+            self.set_update_rate(UPDATE_RATE)
+            pyglet.clock.unschedule(pyglet.app.event_loop._redraw_windows)
+            pyglet.clock.schedule_interval(pyglet.app.event_loop._redraw_windows, UPDATE_RATE)
+            self.idle = False
+
+        return self.redraw_frames
 
     def on_draw(self):
         """
-        Clears the window of graphics before rendering background and sprite graphics and text for the current room.
+        Clears the window of graphics before rendering background and sprite graphics and text for the current room. Every call draws the whole frame, as pyglet's event loop flips the buffers after every call and the back buffer holds no usable frame after a flip. If RENDER_ON_CHANGE is set in the config.py module, the event loop stops calling it while the game is idle (see self.on_update) and the last frame stays on screen.
 
         Parameters
         ----------
@@ -198,6 +408,7 @@ class Game(arcade.Window):
 
         """
 
+        self.redraw_frames = max(self.redraw_frames - 1, 0)
         self.clear()
 
         if self.current_room == 1:
@@ -215,6 +426,13 @@ class Game(arcade.Window):
                     else:
                         arcade.draw_lrwh_rectangle_textured(x, y, TILE_SIZE, TILE_SIZE, self.rooms[self.current_room].map_finish_cell)
 
+            if self.agents is not None:
+                agent_x = self.agents.x * TILE_SIZE + TILE_SIZE/2 + HORIZONTAL_MARGIN
+                agent_y = (TILES_HIGH - self.agents.y - 1) * TILE_SIZE + TILE_SIZE/2 + VERTICAL_MARGIN
+
+                arcade.draw_points(list(zip(agent_x[self.agents.chaser], agent_y[self.agents.chaser])), arcade.color.RED, TILE_SIZE/3)
+                arcade.draw_points(list(zip(agent_x[~self.agents.chaser], agent_y[~self.agents.chaser])), arcade.color.ORANGE, TILE_SIZE/3)
+
             self.rooms[self.current_room].player_sprite.draw()
     
         else:
@@ -223,9 +441,13 @@ class Game(arcade.Window):
             self.rooms[self.current_room].heading.draw()
             self.rooms[self.current_room].text.draw()
 
+            if self.rooms[self.current_room].preview is not None:
+                preview = self.rooms[self.current_room].preview
+                arcade.draw_lrwh_rectangle_textured((SCREEN_WIDTH - preview.width) / 2, DEFAULT_LINE_HEIGHT, preview.width, preview.height, preview)
+
     def on_update(self, delta_time):
         """
-        Updates movable sprite locations in playable levels (mazes only).
+        Updates movable sprite locations in playable levels (mazes only). In endless mode, chunks finished by the background worker are also moved into memory, and in dynamic maze mode walls are changed every DYNAMIC_WALL_INTERVAL seconds (see self.change_walls). If there are agents, they all move one step every AGENT_MOVE_INTERVAL seconds and a chaser reaching the player sends the player back to the start cell (see self.return_to_start). If RENDER_ON_CHANGE is set in the config.py module and nothing is left to redraw, the game goes idle until self.mark_dirty is next called: the update rate is lowered to IDLE_UPDATE_RATE and the redraws pyglet's event loop schedules every UPDATE_RATE seconds are stopped, so the window is neither drawn nor flipped. Input, window exposure, and the timers in this method still wake the game up, at IDLE_UPDATE_RATE at most for the timers.
 
         Parameters
         ----------
@@ -248,9 +470,180 @@ class Game(arcade.Window):
         else:
             pass
 
+        if self.endless_maze is not None:
+            self.endless_maze.poll()
+
+        if self.planner is not None and self.current_room == 1:
+            self.dynamic_timer = self.dynamic_timer + delta_time
+
+            if self.dynamic_timer >= DYNAMIC_WALL_INTERVAL:
+                self.dynamic_timer = 0
+                self.change_walls()
+
+        if self.agents is not None and self.current_room == 1:
+            self.agent_timer = self.agent_timer + delta_time
+
+            if self.agent_timer >= AGENT_MOVE_INTERVAL:
+                self.agent_timer = 0
+
+                if self.agents.step():
+                    self.return_to_start()
+
+                self.mark_dirty()
+
+        if RENDER_ON_CHANGE and self.redraw_frames == 0 and not self.idle:
+            self.set_update_rate(IDLE_UPDATE_RATE)
+            pyglet.clock.unschedule(pyglet.app.event_loop._redraw_windows)
+            self.idle = True
+
+    def change_walls(self):
+        """
+        Dynamic maze mode only, opens or closes DYNAMIC_WALL_CHANGES random inner cells of self.map_grid (never the start, finish, or player's cell), drawn in constant time per cell however large the level and repairs the distance to the finish cell with DStarLite.set_cells (see the dynamic_maze.py module). A change which would cut the player off from the finish cell is undone. self.min_number_steps becomes the steps already taken plus the new remaining minimum, so the player's steps over the minimum (shown on the level finish page and recorded in the player performance rows) stay exact however the maze changes; it no longer matches the band of the difficulty setting the level was generated for, so self.on_key_release moves the setting from self.player_difficulty rather than from it. Called by self.on_update every DYNAMIC_WALL_INTERVAL seconds.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        self.remaining_steps: integer
+            The minimum number of steps from the player's cell to the finish cell
+        self.min_number_steps: integer
+            The minimum number of steps for the level given the walls the player has encountered, used for scoring and display only
+
+        Raises
+        ------
+        None
+
+        """
+
+        # random inner cells drawn directly rather than from a list of every inner cell, rejecting the start, finish, and player's cells and cells already drawn
+        height, width = self.map_grid.shape
+        cells = []
+
+        for attempt in range(DYNAMIC_WALL_CHANGES * 10):
+            if len(cells) == DYNAMIC_WALL_CHANGES:
+                break
+
+            cell = (random.randint(1, height - 2), random.randint(1, width - 2))
+
+            if self.map_grid[cell] <= 1 and cell != self.planner.start and cell not in cells:
+                cells.append(cell)
+
+        for y, x in cells:
+            self.map_grid[y, x] = 1 - self.map_grid[y, x]
+
+        self.planner.set_cells([((y, x), self.map_grid[y, x] == 1) for y, x in cells])
+
+        if self.planner.distance() is None:
+            for y, x in cells:
+                self.map_grid[y, x] = 1 - self.map_grid[y, x]
+
+            self.planner.set_cells([((y, x), self.map_grid[y, x] == 1) for y, x in cells])
+
+        self.remaining_steps = self.planner.distance()
+        self.min_number_steps = self.player_number_steps + self.remaining_steps
+
+        if self.agents is not None:
+            self.agents.update_field(self.planner.start)
+
+        self.mark_dirty()
+
+        return self.remaining_steps, self.min_number_steps
+
+    def on_resize(self, width, height):
+        """
+        Called when the window is resized (or restored), adjusts the viewport and redraws the window.
+
+        Parameters
+        ----------
+        width: integer
+            The new width of the window in pixels
+        height: integer
+            The new height of the window in pixels
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+
+        """
+
+        super().on_resize(width, height)
+        self.mark_dirty()
+
+    def on_show(self):
+        """
+        Called when the window is shown (e.g. restored from minimized), redraws the window.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+
+        """
+
+        self.mark_dirty()
+
+    def on_expose(self):
+        """
+        Called when part of the window has been uncovered and its contents must be redrawn, redraws the window.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+
+        """
+
+        self.mark_dirty()
+
+    def on_close(self):
+        """
+        Called when the window is closed other than through the game over page, saves the session with self.save_snapshot so the player can resume it, with the rows of self.player_stats not yet written to .csv, and saves self.density_controller and writes any player performance rows still buffered in self.player_history before closing. When no snapshot is saved (e.g. in endless mode) the rows of self.player_stats are written to .csv instead.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+
+        """
+
+        if self.current_room == 3 or not self.save_snapshot():
+            self.player_stats.flush()
+
+        self.density_controller.save()
+        self.player_history.flush()
+
+        super().on_close()
+
     def on_key_press(self, key, modifiers):
         """
-        Key event handler, called whenever a key is pressed. In the level, only UP, DOWN, LEFT, RIGHT, and combinations of 2 are used for movement. ESCAPE will end the game, add the final row to self.player_stats and print it to .csv in the ./player_stats directory then bring the player to the final page at any time and, if pressed again from that page, end the program. SPACE will move the player from a page to the next room or end the game if already on the final page.
+        Key event handler, called whenever a key is pressed. In the level, only UP, DOWN, LEFT, RIGHT, and combinations of 2 are used for movement. ESCAPE will end the game, add the final row to self.player_stats and write its buffered rows to the session .csv in the ./player_stats directory (see SessionStats in the player_history.py module), write it and any buffered rows to self.player_history (see the player_history.py module), save self.density_controller, remove the session snapshot (see the snapshot.py module), then bring the player to the final page at any time and, if pressed again from that page, end the program. SPACE will move the player from a page to the next room or end the game if already on the final page.
 
         Parameters
         ----------
@@ -270,6 +663,8 @@ class Game(arcade.Window):
 
         """
 
+        self.mark_dirty()
+
         if key == arcade.key.SPACE:
             if self.current_room == 0:
                 self.current_room = 1
@@ -292,8 +687,14 @@ class Game(arcade.Window):
                 arcade.exit()
 
             else:
-                self.player_stats = pd.concat([self.player_stats, pd.DataFrame([[dt.now().strftime("%Y-%m-%d %H:%M:%S"), "noname", self.iteration, self.player_difficulty, self.min_number_steps, self.player_number_steps, "no"]], columns = self.player_stats.columns)], ignore_index = True)
-                self.player_stats.to_csv(f"./player_stats/player_stats_noname_{dt.now().strftime('%Y%m%d%H%M')}.csv")
+                row = [dt.now().strftime("%Y-%m-%d %H:%M:%S"), self.username, self.iteration, self.player_difficulty, self.min_number_steps, self.player_number_steps, "no", self.level_id]
+                self.player_stats.record(row)
+                self.player_stats.flush()
+                self.player_history.record(row)
+                self.player_history.record_features(self.level_id, self.level_features)
+                self.player_history.flush()
+                self.density_controller.save()
+                remove_snapshot(self.snapshot_file)
                 self.current_room = 3
 
         if self.current_room == 1:
@@ -314,7 +715,7 @@ class Game(arcade.Window):
 
     def on_key_release(self, key, modifiers):
         """
-        Key event handler, called whenever a key is released and manages processes that result from specific keypress events. Player sprite movement is determined by calling self.move_player (which then calls self.check_valid_move) and keypress variables reset (to enable diagonal movement). If the player sprite has reached the finish cell, info is added as a row to self.player_stats, user difficulty setting is recalculated for the next maze level, global variables required for the level finish page 'finish_level' and game over page 'finish_game' are set, new rooms (aka level and pages) are setup, and the player is move to the level finish page 'finish_level'.
+        Key event handler, called whenever a key is released and manages processes that result from specific keypress events. Player sprite movement is determined by calling self.move_player (which then calls self.check_valid_move) and keypress variables reset (to enable diagonal movement). If the player sprite has reached the finish cell, info is added as a row to self.player_stats (appended to the session .csv in batches) and buffered for self.player_history, user difficulty setting is moved up or down by one for the next maze level depending on the player's steps over the minimum, global variables required for the level finish page 'finish_level' and game over page 'finish_game' are set, new rooms (aka level and pages) are setup, and the player is move to the level finish page 'finish_level'.
 
         Parameters
         ----------
@@ -339,6 +740,8 @@ class Game(arcade.Window):
             A global variable recording number of steps the player made to reach the finish cell for the current level (for use in setup_finish_level and setup_finish_game)
         min_number_steps_global: integer
             A global variable recording minimum number of steps required from start to finish cells for the current level (for use in setup_finish_level and setup_finish_game)
+        level_grid_global: array
+            A global variable recording the level array of the level just completed (for the preview in setup_finish_level)
 
         Raises
         ------
@@ -350,6 +753,9 @@ class Game(arcade.Window):
         global player_number_steps_global
         global min_number_steps_global
         global iteration_global
+        global level_grid_global
+
+        self.mark_dirty()
 
         if self.up_pressed or self.down_pressed or self.left_pressed or self.right_pressed:
             self.move_player()
@@ -363,29 +769,35 @@ class Game(arcade.Window):
             player_difficulty_global = self.player_difficulty
             player_performance = self.player_number_steps - self.min_number_steps
 
+            # the setting moves one step from the one the level was generated for rather than from its minimum number of steps, as a fallback level (see generate_validated_level in the level_generator.py module) can lie outside the band of the setting, and in dynamic maze mode self.change_walls moves the minimum number of steps while the level is played
             if player_performance <= 2:
                 if self.player_difficulty == "Level 4":
                     pass
                 else:
-                    self.player_difficulty = "Level " + str(int(difficulty_scale(self.min_number_steps)[-1:]) + 1)
+                    self.player_difficulty = "Level " + str(int(self.player_difficulty[-1:]) + 1)
 
             elif player_performance >= 5:
                 if self.player_difficulty == "Level 1":
                     pass
                 else:
-                    self.player_difficulty = "Level " + str(int(difficulty_scale(self.min_number_steps)[-1:]) - 1)
+                    self.player_difficulty = "Level " + str(int(self.player_difficulty[-1:]) - 1)
             
             iteration_global = self.iteration
             player_number_steps_global = self.player_number_steps
             min_number_steps_global = self.min_number_steps
+            level_grid_global = self.map_grid
 
-            self.player_stats = pd.concat([self.player_stats, pd.DataFrame([[dt.now().strftime("%Y-%m-%d %H:%M:%S"), "noname", self.iteration, self.player_difficulty, self.min_number_steps, self.player_number_steps, "yes"]], columns = self.player_stats.columns)], ignore_index = True)
+            row = [dt.now().strftime("%Y-%m-%d %H:%M:%S"), self.username, self.iteration, self.player_difficulty, self.min_number_steps, self.player_number_steps, "yes", self.level_id]
+            self.player_stats.record(row)
+            self.player_history.record(row)
+            self.player_history.record_features(self.level_id, self.level_features)
 
             self.setup()
             self.iteration = self.iteration + 1
             self.current_room = 2
+            self.save_snapshot()
 
-            return self.current_room, self.player_difficulty, self.iteration, player_difficulty_global, iteration_global, player_number_steps_global, min_number_steps_global
+            return self.current_room, self.player_difficulty, self.iteration, player_difficulty_global, iteration_global, player_number_steps_global, min_number_steps_global, level_grid_global
 
     def move_player(self):
         """
@@ -441,7 +853,7 @@ class Game(arcade.Window):
 
     def check_valid_move(self):
         """
-        This function checks if the cell the player sprite would next enter is accessible (e.g. an open or the finish cell) or not (e.g. a wall) by calculating its exact position in pixels and referencing that against self.map_grid; if accessible, the player_sprite is moved to the new cell; if not, nothing happens. It is triggered by self.move_player which is itself triggered by self.on_key_release.
+        This function checks if the cell the player sprite would next enter is accessible (e.g. an open or the finish cell) or not (e.g. a wall) by calculating its exact position in pixels and referencing that against self.map_grid; if accessible, the player_sprite is moved to the new cell; if not, nothing happens. It is triggered by self.move_player which is itself triggered by self.on_key_release. In endless mode, the cell is instead looked up in world coordinates with ChunkedMaze.get_cell (see the chunks.py module) and, if accessible, the player's world coordinates are moved and the window around the player reloaded while the player sprite stays in the center of the screen. In dynamic maze mode, self.planner is told the player's new cell so self.remaining_steps stays exact. If there are agents, their flow field is recomputed towards the player's new cell, and a chaser already on it sends the player back to the start cell.
 
         Parameters
         ----------
@@ -460,6 +872,24 @@ class Game(arcade.Window):
 
         self.new_y_coordinates = TILES_HIGH - int((self.new_y - TILE_SIZE/2 - VERTICAL_MARGIN) / TILE_SIZE) - 1
         self.new_x_coordinates = int((self.new_x - TILE_SIZE/2 - HORIZONTAL_MARGIN) / TILE_SIZE)
+
+        if self.endless_maze is not None:
+            new_world_x = self.world_x + self.new_x_coordinates - TILES_WIDE // 2
+            new_world_y = self.world_y + self.new_y_coordinates - TILES_HIGH // 2
+
+            if self.endless_maze.get_cell(new_world_x, new_world_y) == 1:
+                pass
+
+            else:
+                self.world_x = new_world_x
+                self.world_y = new_world_y
+                self.load_endless_window()
+                self.player_number_steps += 1
+
+            self.new_y_coordinates = TILES_HIGH // 2
+            self.new_x_coordinates = TILES_WIDE // 2
+
+            return self.player_number_steps
         
         if self.map_grid[[self.new_y_coordinates], [self.new_x_coordinates]] == 1:
             pass
@@ -468,8 +898,80 @@ class Game(arcade.Window):
             self.rooms[self.current_room].player_sprite.center_y = self.new_y
             self.rooms[self.current_room].player_sprite.center_x = self.new_x
             self.player_number_steps += 1
+
+            if self.planner is not None:
+                self.planner.move_start((self.new_y_coordinates, self.new_x_coordinates))
+                self.remaining_steps = self.planner.distance()
+
+            if self.agents is not None:
+                self.agents.update_field((self.new_y_coordinates, self.new_x_coordinates))
+
+                if self.agents.caught():
+                    self.return_to_start()
+
             return self.player_number_steps
 
+    def return_to_start(self):
+        """
+        Sends the player sprite back to the start cell of the level with self.place_player, called by self.on_update when a chaser catches the player (see the agents.py module). The steps already taken still count towards self.player_number_steps.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        self.new_y_coordinates: integer
+            The row of the start cell
+        self.new_x_coordinates: integer
+            The column of the start cell
+
+        Raises
+        ------
+        None
+
+        """
+
+        return self.place_player(*np.argwhere(self.map_grid == 2)[0])
+
+    def place_player(self, y, x):
+        """
+        Puts the player sprite on a cell of the level without counting a step, and tells self.planner and self.agents, if there are any. Called by self.return_to_start and, when resuming a snapshot, by self.setup.
+
+        Parameters
+        ----------
+        y: integer
+            The row of the cell
+        x: integer
+            The column of the cell
+
+        Returns
+        -------
+        self.new_y_coordinates: integer
+            The row of the cell
+        self.new_x_coordinates: integer
+            The column of the cell
+
+        Raises
+        ------
+        None
+
+        """
+
+        self.new_y_coordinates, self.new_x_coordinates = int(y), int(x)
+
+        self.rooms[1].player_sprite.center_x = self.new_x_coordinates * TILE_SIZE + TILE_SIZE/2 + HORIZONTAL_MARGIN
+        self.rooms[1].player_sprite.center_y = (TILES_HIGH - self.new_y_coordinates - 1) * TILE_SIZE + TILE_SIZE/2 + VERTICAL_MARGIN
+
+        if self.planner is not None:
+            self.planner.move_start((self.new_y_coordinates, self.new_x_coordinates))
+            self.remaining_steps = self.planner.distance()
+
+        if self.agents is not None:
+            self.agents.update_field((self.new_y_coordinates, self.new_x_coordinates))
+
+        return self.new_y_coordinates, self.new_x_coordinates
+
 def setup_intro():
     """
     Instantiates and returns the Room intro page with graphics and text containing functional information for the user at the start of game.
@@ -549,13 +1051,14 @@ def setup_level(map_grid):
 
     return level
 
-def setup_finish_level():
+def setup_finish_level(finish_level_page = None):
     """
-    Instantiates and returns the Room level finish page with graphics and text containing functional information for the user after completing a maze level. Note that although the player sprite is also referred to, it is not rendered for the user.
+    Instantiates and returns the Room level finish page with graphics and text containing functional information for the user after completing a maze level, including a thumbnail of the completed level rendered with render_level (see the thumbnails.py module). Passed the page set up for the previous level, only its text and thumbnail are updated, as every new text layout grows the memory of the process (see the soak.py module). The thumbnail is drawn from the single texture preview_texture, whose image is replaced in the texture atlas for every level rather than a new texture being added to it. Note that although the player sprite is also referred to, it is not rendered for the user.
 
     Parameters
     ----------
-    None
+    finish_level_page: object
+        Optional, the level finish page set up for the previous level
 
     Returns
     -------
@@ -572,66 +1075,44 @@ def setup_finish_level():
     global player_number_steps_global
     global player_difficulty_global
     global iteration_global
-
-    finish_level_page = Room()
-
-    finish_level_page.background = arcade.load_texture("./img/colosseum.png")
-
-    start_x = 0
-    start_y = SCREEN_HEIGHT - DEFAULT_LINE_HEIGHT * 1.5
-    finish_level_page.heading = arcade.Text(
-        "You did it!",
-        start_x,
-        start_y,
-        arcade.color.BLACK,
-        DEFAULT_FONT_SIZE * 2,
-        width=SCREEN_WIDTH,
-        align="center"
-    )
+    global level_grid_global
+    global preview_texture
 
     if player_number_steps_global == min_number_steps_global and player_number_steps_global == 1:
-        start_y = SCREEN_HEIGHT - DEFAULT_LINE_HEIGHT * 3
-        finish_level_page.text = arcade.Text(
-            f"Maze number {iteration_global} completed! \nYou are currently at Difficulty {player_difficulty_global}\nYou found the fastest route, only {str(player_number_steps_global)} step!\n\nPress SPACE to continue or ESCAPE to quit.",
-            start_x,
-            start_y,
-            arcade.color.BLACK,
-            DEFAULT_FONT_SIZE*0.8,
-            multiline = True,
-            width = SCREEN_WIDTH,
-            align="center"
-        )
-    
+        text = f"Maze number {iteration_global} completed! \nYou are currently at Difficulty {player_difficulty_global}\nYou found the fastest route, only {str(player_number_steps_global)} step!\n\nPress SPACE to continue or ESCAPE to quit."
+
     elif player_number_steps_global == min_number_steps_global:
-        start_y = SCREEN_HEIGHT - DEFAULT_LINE_HEIGHT * 3
-        finish_level_page.text = arcade.Text(
-            f"Maze number {iteration_global} completed! \nYou are currently at Difficulty {player_difficulty_global}\nYou found the fastest route, only {str(player_number_steps_global)} steps!\n\nPress SPACE to continue or ESCAPE to quit.",
-            start_x,
-            start_y,
-            arcade.color.BLACK,
-            DEFAULT_FONT_SIZE*0.8,
-            multiline = True,
-            width = SCREEN_WIDTH,
-            align="center"
-        )
+        text = f"Maze number {iteration_global} completed! \nYou are currently at Difficulty {player_difficulty_global}\nYou found the fastest route, only {str(player_number_steps_global)} steps!\n\nPress SPACE to continue or ESCAPE to quit."
 
     elif min_number_steps_global == 1:
-        start_y = SCREEN_HEIGHT - DEFAULT_LINE_HEIGHT * 3
-        finish_level_page.text = arcade.Text(
-            f"Maze number {iteration_global} completed! \nYou are currently at Difficulty {player_difficulty_global}\nIt took you {str(player_number_steps_global)} steps to get there but it took math only {str(min_number_steps_global)} step.\n\nPress SPACE to continue or ESCAPE to quit.",
+        text = f"Maze number {iteration_global} completed! \nYou are currently at Difficulty {player_difficulty_global}\nIt took you {str(player_number_steps_global)} steps to get there but it took math only {str(min_number_steps_global)} step.\n\nPress SPACE to continue or ESCAPE to quit."
+
+    else:
+        text = f"Maze number {iteration_global} completed! \nYou are currently at Difficulty {player_difficulty_global}\nIt took you {str(player_number_steps_global)} steps to get there but it took math only {str(min_number_steps_global)} steps.\n\nPress SPACE to continue or ESCAPE to quit."
+
+    if finish_level_page is not None:
+        finish_level_page.text.text = text
+
+    else:
+        finish_level_page = Room()
+
+        finish_level_page.background = arcade.load_texture("./img/colosseum.png")
+
+        start_x = 0
+        start_y = SCREEN_HEIGHT - DEFAULT_LINE_HEIGHT * 1.5
+        finish_level_page.heading = arcade.Text(
+            "You did it!",
             start_x,
             start_y,
             arcade.color.BLACK,
-            DEFAULT_FONT_SIZE*0.8,
-            multiline = True,
-            width = SCREEN_WIDTH,
+            DEFAULT_FONT_SIZE * 2,
+            width=SCREEN_WIDTH,
             align="center"
         )
 
-    else:
         start_y = SCREEN_HEIGHT - DEFAULT_LINE_HEIGHT * 3
         finish_level_page.text = arcade.Text(
-            f"Maze number {iteration_global} completed! \nYou are currently at Difficulty {player_difficulty_global}\nIt took you {str(player_number_steps_global)} steps to get there but it took math only {str(min_number_steps_global)} steps.\n\nPress SPACE to continue or ESCAPE to quit.",
+            text,
             start_x,
             start_y,
             arcade.color.BLACK,
@@ -640,18 +1121,35 @@ def setup_finish_level():
             width = SCREEN_WIDTH,
             align="center"
         )
-    
-    finish_level_page.player_sprite = arcade.Sprite("./img/player_small.png")
+
+        finish_level_page.player_sprite = arcade.Sprite("./img/player_small.png")
+
+    if level_grid_global is not None:
+        image = Image.fromarray(render_level(level_grid_global)).convert("RGBA")
+
+        # one texture reused for every level, as arcade keeps every texture name it has drawn in its texture atlas
+        if preview_texture is None:
+            preview_texture = arcade.Texture("preview", image = image)
+
+        else:
+            preview_texture.image = image
+            atlas = arcade.get_window().ctx.default_atlas
+
+            if atlas.has_texture(preview_texture):
+                atlas.update_texture_image(preview_texture)
+
+        finish_level_page.preview = preview_texture
     
     return finish_level_page
 
-def setup_finish_game():
+def setup_finish_game(finish_game_page = None):
     """
-    Instantiates and returns the Room game over page with graphics and text containing functional information for the user after quitting the game. Note that although the player sprite is also referred to, it is not rendered for the user.
+    Instantiates and returns the Room game over page with graphics and text containing functional information for the user after quitting the game. Passed the page set up for the previous level, only its text is updated (see setup_finish_level). Note that although the player sprite is also referred to, it is not rendered for the user.
 
     Parameters
     ----------
-    None
+    finish_game_page: object
+        Optional, the game over page set up for the previous level
 
     Returns
     -------
@@ -669,6 +1167,13 @@ def setup_finish_game():
     global player_difficulty_global
     global iteration_global
 
+    text = f"Your dragon reached the Sparkly {iteration_global} times and is very grateful!\n\nTell us how you liked Automaze and find out more about us at sifgames.com\n\nPress SPACE or ESCAPE to exit the window."
+
+    if finish_game_page is not None:
+        finish_game_page.text.text = text
+
+        return finish_game_page
+
     finish_game_page = Room()
     finish_game_page.background = arcade.load_texture("./img/colosseum.png")
 
@@ -686,7 +1191,7 @@ def setup_finish_game():
 
     start_y = SCREEN_HEIGHT - DEFAULT_LINE_HEIGHT * 3
     finish_game_page.text = arcade.Text(
-        f"Your dragon reached the Sparkly {iteration_global} times and is very grateful!\n\nTell us how you liked Automaze and find out more about us at sifgames.com\n\nPress SPACE or ESCAPE to exit the window.",
+        text,
         start_x,
         start_y,
         arcade.color.BLACK,
@@ -718,6 +1223,8 @@ def main():
 
     """
     
+    logging.basicConfig(level = LOG_LEVEL, format = "%(asctime)s %(name)s %(levelname)s %(message)s")
+
     window = Game(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE)
     window.setup()
     arcade.run()
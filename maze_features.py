@@ -0,0 +1,214 @@
+"""
+This file is a module for the game Automaze. It extracts maze complexity features (dead ends, branching factor, corridor lengths, turns on the optimal path, and reachable area) from one level array or a whole batch of them at once using numpy array shifts (i.e. 3x3 convolutions) rather than cell-by-cell loops, and combines them into a difficulty score richer than the minimum number of steps alone. It is imported into the Automaze agents.py, generators.py, level_generator.py, and main.py modules and references the config.py module.
+"""
+
+from config import *
+
+import numpy as np
+import pandas as pd
+from scipy import ndimage
+
+FEATURE_COLUMNS = ["MNS", "reachable_area", "dead_ends", "branching_factor", "mean_corridor_length", "max_corridor_length", "turns"]
+
+# The 8 steps (dy, dx) a player can take, in the order used to break ties between equally short paths
+STEPS = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+def shift(array, dy, dx):
+    """
+    Shifts the last two axes of a batch of arrays by (dy, dx), filling with zeros, so that shift(array, dy, dx)[..., y, x] == array[..., y - dy, x - dx].
+    """
+
+    shifted = np.zeros_like(array)
+    height, width = array.shape[-2:]
+
+    shifted[..., max(dy, 0):height + min(dy, 0), max(dx, 0):width + min(dx, 0)] = array[..., max(-dy, 0):height - max(dy, 0), max(-dx, 0):width - max(dx, 0)]
+
+    return shifted
+
+def neighbor_counts(open_cells):
+    """
+    Counts the open neighbors (of 8) of every cell of a batch of boolean arrays, equivalent to a 3x3 convolution with a kernel of ones and a zero in the middle.
+    """
+
+    counts = np.zeros(open_cells.shape, dtype = np.int8)
+
+    for dy, dx in STEPS:
+        counts += shift(open_cells, dy, dx)
+
+    return counts
+
+def distance_fields(levels, sources = None):
+    """
+    Computes the minimum number of steps from the start cell (or other source cells) to every cell of a batch of level arrays with a breadth-first wavefront that advances all levels by one step per iteration. Also used by the agents.py module for its flow field.
+
+    Parameters
+    ----------
+    levels: array
+        3D numpy array of shape (number of levels, height, width) containing coded cells (see level_generator.py module for codes), each level with exactly one start cell
+    sources: array
+        Optional, boolean array of the same shape marking the cells the distances are measured from, defaults to the start cells
+
+    Returns
+    -------
+    distances: array
+        3D numpy array of the same shape and type int32, -1 for cells which cannot be reached
+
+    Raises
+    ------
+    None
+    """
+
+    open_cells = levels != 1
+    frontier = levels == 2 if sources is None else sources & open_cells
+
+    distances = np.where(frontier, 0, -1).astype(np.int32)
+    step = 0
+
+    while frontier.any():
+        step = step + 1
+        reached = np.zeros_like(frontier)
+
+        for dy, dx in STEPS:
+            reached |= shift(frontier, dy, dx)
+
+        frontier = reached & open_cells & (distances == -1)
+        distances[frontier] = step
+
+    return distances
+
+def count_turns(levels, distances):
+    """
+    Counts the changes of direction along one optimal path from the finish cell back to the start cell for every level of a batch, walking all levels at once. Where several optimal next cells exist, carrying on in the same direction is preferred, so the count is the fewest turns among the paths found greedily.
+    """
+
+    number_levels, height, width = levels.shape
+    batch = np.arange(number_levels)
+
+    finish = np.argwhere(levels == 3)
+    y = np.zeros(number_levels, dtype = np.intp)
+    x = np.zeros(number_levels, dtype = np.intp)
+    y[finish[:, 0]] = finish[:, 1]
+    x[finish[:, 0]] = finish[:, 2]
+
+    padded = np.pad(distances, ((0, 0), (1, 1), (1, 1)), constant_values = -1)
+    remaining = np.maximum(distances[batch, y, x], 0)
+
+    direction = np.full(number_levels, -1)
+    turns = np.zeros(number_levels, dtype = np.int32)
+    steps = np.array(STEPS)
+
+    while (remaining > 0).any():
+        # candidate distance of each of the 8 neighbors, preferring the previous direction
+        candidates = padded[batch[:, None], y[:, None] + 1 + steps[:, 0], x[:, None] + 1 + steps[:, 1]] == (remaining - 1)[:, None]
+        preferred = np.where(direction >= 0, direction, 0)
+        keep_direction = candidates[batch, preferred] & (direction >= 0)
+        chosen = np.where(keep_direction, preferred, np.argmax(candidates, axis = 1))
+
+        moving = remaining > 0
+        turns += (moving & (direction >= 0) & (chosen != direction)).astype(np.int32)
+        direction = np.where(moving, chosen, direction)
+
+        y = np.where(moving, y + steps[chosen, 0], y)
+        x = np.where(moving, x + steps[chosen, 1], x)
+        remaining = np.where(moving, remaining - 1, remaining)
+
+    return turns
+
+def extract_features(levels):
+    """
+    Extracts the maze complexity features of one level array or a batch of level arrays of the same size in a single vectorized pass.
+
+    Features:
+    MNS == minimum number of steps from start to finish cells (breadth-first, -1 if there is no path)
+    reachable_area == number of cells reachable from the start cell
+    dead_ends == number of reachable cells with exactly one open neighbor
+    branching_factor == mean number of open neighbors of reachable cells, minus the one the player came from
+    mean_corridor_length, max_corridor_length == sizes of the runs of reachable cells with exactly two open neighbors
+    turns == changes of direction along an optimal path (see count_turns)
+
+    Parameters
+    ----------
+    levels: array
+        2D numpy array containing coded cells, or 3D numpy array of shape (number of levels, height, width)
+
+    Returns
+    -------
+    features: dataframe
+        One row per level with the columns in FEATURE_COLUMNS
+
+    Raises
+    ------
+    None
+    """
+
+    levels = np.asarray(levels)
+
+    if levels.ndim == 2:
+        levels = levels[np.newaxis]
+
+    number_levels = levels.shape[0]
+
+    distances = distance_fields(levels)
+    reachable = distances >= 0
+    counts = neighbor_counts(levels != 1)
+
+    reachable_area = reachable.sum(axis = (1, 2))
+    dead_ends = (reachable & (counts == 1)).sum(axis = (1, 2))
+    branching_factor = np.where(reachable, counts - 1, 0).sum(axis = (1, 2)) / np.maximum(reachable_area, 1)
+
+    # corridors are labelled in all levels at once, the structure stops labels from spanning two levels
+    structure = np.zeros((3, 3, 3))
+    structure[1] = 1
+    labels, number_corridors = ndimage.label(reachable & (counts == 2), structure = structure)
+
+    sizes = np.bincount(labels.ravel(), minlength = number_corridors + 1)[1:]
+    level_of_label = np.zeros(number_corridors + 1, dtype = np.intp)
+    level_of_label[labels.ravel()] = np.repeat(np.arange(number_levels), labels[0].size)
+    level_of_label = level_of_label[1:]
+
+    number_per_level = np.bincount(level_of_label, minlength = number_levels)
+    mean_corridor_length = np.bincount(level_of_label, weights = sizes, minlength = number_levels) / np.maximum(number_per_level, 1)
+    max_corridor_length = np.zeros(number_levels, dtype = np.int64)
+    np.maximum.at(max_corridor_length, level_of_label, sizes)
+
+    finish_distance = np.where(levels == 3, distances, -1).max(axis = (1, 2))
+    turns = count_turns(levels, distances)
+
+    return pd.DataFrame({
+        "MNS": finish_distance,
+        "reachable_area": reachable_area,
+        "dead_ends": dead_ends,
+        "branching_factor": branching_factor,
+        "mean_corridor_length": mean_corridor_length,
+        "max_corridor_length": max_corridor_length,
+        "turns": turns
+    }, columns = FEATURE_COLUMNS)
+
+def difficulty_score(features, number_steps):
+    """
+    Combines the minimum number of steps with the maze complexity features into one difficulty score on the same scale, so it can be graded with difficulty_scale from the config.py module. Called by LevelGenerator.validate_difficulty when USE_FEATURE_SCORE is set in the config.py module.
+
+    Parameters
+    ----------
+    features: series or dataframe
+        Features of one level (a row of extract_features) or of a batch of levels
+    number_steps: integer or array
+        The minimum number of steps the score is based on
+
+    Returns
+    -------
+    float or series
+        number_steps plus the features weighted with DIFFICULTY_FEATURE_WEIGHTS from the config.py module
+
+    Raises
+    ------
+    KeyError
+        Raised when DIFFICULTY_FEATURE_WEIGHTS refers to a feature not in FEATURE_COLUMNS
+    """
+
+    score = number_steps
+
+    for feature, weight in DIFFICULTY_FEATURE_WEIGHTS.items():
+        score = score + weight * features[feature]
+
+    return score
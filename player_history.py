@@ -0,0 +1,333 @@
+"""
+This file is a module for the game Automaze. It stores the player performance rows of every session in an SQLite database (in WAL mode, so writing never blocks reading) and lets a returning player resume at the difficulty setting and maze number where they left off. The maze complexity features of every level played are stored alongside, keyed by level ID, for tuning the difficulty score, as is every player's filter of levels already served (see the dedup.py module). The rows of the current session are also appended to a .csv file per session (SessionStats). It is imported into the Automaze main.py and soak.py modules and references the config.py, dedup.py, and maze_features.py modules.
+"""
+
+from config import *
+from dedup import SeenLevels
+from maze_features import FEATURE_COLUMNS
+
+import csv
+import os
+import sqlite3
+
+class PlayerHistory():
+    """
+    Player history store backed by SQLite. Rows are buffered in memory and written in batches of batch_size (and on flush), so recording a row from Game.on_key_release costs no disk access. The table player_stats has the columns in PlayerHistory.COLUMNS, as do the session .csv files written by SessionStats, and is indexed on (username, timestamp), timestamp, and difficulty. The table level_features holds one row per level ID with the columns in FEATURE_COLUMNS from the maze_features.py module, buffered and written the same way. The table seen_levels holds one SeenLevels filter (see the dedup.py module) per username, the latest one saved written on flush.
+    """
+
+    COLUMNS = ["timestamp", "username", "iteration", "difficulty", "MNS", "PNS", "completed", "level_id"]
+
+    def __init__(self, path = PLAYER_HISTORY_FILE, batch_size = PLAYER_HISTORY_BATCH_SIZE):
+        """
+        Initializes class instance, opens (or creates) the database, and creates the table and indexes if they do not exist yet.
+
+        Parameters
+        ----------
+        path: string
+            The SQLite database file, defaults to PLAYER_HISTORY_FILE in the config.py module
+        batch_size: integer
+            The number of rows buffered before they are written, defaults to PLAYER_HISTORY_BATCH_SIZE in the config.py module
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        sqlite3.OperationalError
+            Raised when the database file cannot be opened
+        """
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = []
+        self.pending_features = []
+        self.pending_seen_levels = {}
+
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS player_stats (timestamp TEXT, username TEXT, iteration INTEGER, difficulty TEXT, MNS INTEGER, PNS INTEGER, completed TEXT, level_id TEXT)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS player_stats_username_timestamp ON player_stats (username, timestamp)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS player_stats_timestamp ON player_stats (timestamp)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS player_stats_difficulty ON player_stats (difficulty)")
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS level_features (level_id TEXT PRIMARY KEY, {', '.join(column + ' REAL' for column in FEATURE_COLUMNS)})")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS seen_levels (username TEXT PRIMARY KEY, bloom BLOB)")
+
+    def record(self, row):
+        """
+        Buffers one player performance row and writes the buffer once it holds batch_size rows. Called by Game.on_key_release and Game.on_key_press in the main.py module.
+
+        Parameters
+        ----------
+        row: list
+            Values for the columns in PlayerHistory.COLUMNS, in that order
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        self.pending.append(tuple(row))
+
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def record_features(self, level_id, features):
+        """
+        Buffers the maze complexity features of a level, written together with the next batch of player performance rows. Called by Game.on_key_release and Game.on_key_press in the main.py module.
+
+        Parameters
+        ----------
+        level_id: string
+            The level ID (see the level_generator.py module)
+        features: series
+            The features of the level, a row of extract_features from the maze_features.py module
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        if level_id is not None and features is not None:
+            self.pending_features.append(tuple([level_id] + [float(features[column]) for column in FEATURE_COLUMNS]))
+
+    def load_seen_levels(self, username):
+        """
+        Loads a player's filter of levels already served.
+
+        Parameters
+        ----------
+        username: string
+            The player's username
+
+        Returns
+        -------
+        object
+            SeenLevels instance (see the dedup.py module), empty if the player has none saved
+
+        Raises
+        ------
+        None
+        """
+
+        if username in self.pending_seen_levels:
+            return SeenLevels(self.pending_seen_levels[username])
+
+        row = self.connection.execute("SELECT bloom FROM seen_levels WHERE username = ?", (username,)).fetchone()
+
+        return SeenLevels(row[0] if row is not None else None)
+
+    def save_seen_levels(self, username, seen_levels):
+        """
+        Buffers a player's filter of levels already served, written on the next flush. Called by Game.generate_new_level in the main.py module and the soak test (see the soak.py module).
+
+        Parameters
+        ----------
+        username: string
+            The player's username
+        seen_levels: object
+            SeenLevels instance (see the dedup.py module)
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        self.pending_seen_levels[username] = seen_levels.to_bytes()
+
+    def flush(self):
+        """
+        Writes all buffered rows (and level features and seen-level filters) in a single transaction.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        integer
+            The number of rows written
+
+        Raises
+        ------
+        None
+        """
+
+        written = len(self.pending)
+
+        if written or self.pending_features or self.pending_seen_levels:
+            with self.connection:
+                self.connection.executemany(f"INSERT INTO player_stats ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})", self.pending)
+                self.connection.executemany(f"INSERT OR REPLACE INTO level_features (level_id, {', '.join(FEATURE_COLUMNS)}) VALUES ({', '.join('?' * (len(FEATURE_COLUMNS) + 1))})", self.pending_features)
+                self.connection.executemany("INSERT OR REPLACE INTO seen_levels (username, bloom) VALUES (?, ?)", self.pending_seen_levels.items())
+
+            self.pending = []
+            self.pending_features = []
+            self.pending_seen_levels = {}
+
+        return written
+
+    def last_session(self, username):
+        """
+        Looks up where a returning player left off with a single query on the (username, timestamp) index.
+
+        Parameters
+        ----------
+        username: string
+            The player's username
+
+        Returns
+        -------
+        tuple or None
+            The difficulty setting (string, expressed as "Level n") and maze number (integer) to resume at, None if the player has no history. The maze number is one after the last recorded maze if it was completed and the same maze number if the player quit during it.
+
+        Raises
+        ------
+        None
+        """
+
+        self.flush()
+
+        row = self.connection.execute("SELECT difficulty, iteration, completed FROM player_stats WHERE username = ? ORDER BY timestamp DESC, rowid DESC LIMIT 1", (username,)).fetchone()
+
+        if row is None:
+            return None
+
+        difficulty, iteration, completed = row
+
+        if completed == "yes":
+            iteration = iteration + 1
+
+        return difficulty, iteration
+
+    def close(self):
+        """
+        Writes all buffered rows and closes the database.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        self.flush()
+        self.connection.close()
+
+
+class SessionStats():
+    """
+    The player performance rows of one game session, written to a .csv file (by default in the ./player_stats directory). Rows are buffered in memory and appended to the file in batches of batch_size (and on flush), so however many levels a session lasts at most batch_size rows are held, rather than one dataframe grown by a concatenation per level and written in full at the end of the game. The rows not yet written are saved with the session snapshot (see the snapshot.py module).
+    """
+
+    def __init__(self, path, rows = None, batch_size = SESSION_STATS_BATCH_SIZE):
+        """
+        Initializes class instance. The file is only created once the first rows are written.
+
+        Parameters
+        ----------
+        path: string
+            The .csv file of the session
+        rows: list
+            Optional, rows not yet written, e.g. from a session snapshot
+        batch_size: integer
+            The number of rows buffered before they are written, defaults to SESSION_STATS_BATCH_SIZE in the config.py module
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = [list(row) for row in rows or []]
+
+    def record(self, row):
+        """
+        Buffers one player performance row and appends the buffer to the file once it holds batch_size rows. Called by Game.on_key_release and Game.on_key_press in the main.py module.
+
+        Parameters
+        ----------
+        row: list
+            Values for the columns in PlayerHistory.COLUMNS, in that order
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        self.pending.append(list(row))
+
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Appends all buffered rows to the file, with a header row if the file is new.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        integer
+            The number of rows written
+
+        Raises
+        ------
+        OSError
+            Raised when the file cannot be written
+        """
+
+        written = len(self.pending)
+
+        if written:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok = True)
+
+            new_file = not os.path.exists(self.path)
+
+            with open(self.path, "a", newline = "") as stats_file:
+                writer = csv.writer(stats_file)
+
+                if new_file:
+                    writer.writerow(PlayerHistory.COLUMNS)
+
+                writer.writerows(self.pending)
+
+            self.pending = []
+
+        return written
\ No newline at end of file
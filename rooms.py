@@ -30,4 +30,5 @@ class Room():
         self.map_open_cell = None
         self.map_wall_cell = None
         self.map_finish_cell = None
-        self.player_sprite = None
\ No newline at end of file
+        self.player_sprite = None
+        self.preview = None
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+This file is a module for the game Automaze. It saves the state of a game session (the current level array, the player's cell, number of steps taken, minimum number of steps, difficulty setting, maze number, level ID, and the player performance rows not yet written to .csv) to a compact binary snapshot file, and reads it back through a memory map, so a player who closes the game goes straight back into their level on the next start without generating a new one: the snapshot is read by Game.__init__ in the main.py module, which restores the difficulty setting, maze number, and player performance rows, and Game.setup then sets up the saved level and puts the player back on their cell. Snapshots are written to a temporary file and renamed over the old one, so a crash mid-write never leaves a broken snapshot. It is imported into the Automaze main.py module and references the config.py module.
+
+Snapshot layout (little-endian):
+header == magic b"AMZS", format version, height, width, player row, player column (5 x uint16), number of steps taken, minimum number of steps, maze number (3 x uint32), difficulty setting n of "Level n" (uint8), lengths of the username, level ID, and player performance rows (uint16, uint16, uint32)
+body == level array (height x width uint8 cell codes), username and level ID (UTF-8), player performance rows (JSON, UTF-8)
+"""
+
+from config import *
+
+import json
+import mmap
+import os
+import struct
+import numpy as np
+
+MAGIC = b"AMZS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4s5H3IBHHI")
+
+def write_snapshot(username, map_grid, player, player_number_steps, min_number_steps, player_difficulty, iteration, level_id, stats_rows, path = SNAPSHOT_FILE):
+    """
+    Writes a snapshot of a game session, replacing the previous one atomically. Called by Game.save_snapshot in the main.py module.
+
+    Parameters
+    ----------
+    username: string
+        The player's username
+    map_grid: array
+        2D numpy array containing coded cells (see level_generator.py module for codes)
+    player: tuple
+        The (y, x) coordinates of the player's cell
+    player_number_steps: integer
+        The number of steps the player has taken in the level
+    min_number_steps: integer
+        The minimum number of steps for the level
+    player_difficulty: string
+        The player's current difficulty setting, expressed as "Level n" where n is between 1 (easiest) and 4 (hardest)
+    iteration: integer
+        The maze number
+    level_id: string or None
+        The level ID (see the level_generator.py module)
+    stats_rows: list
+        The player performance rows of the session not yet written to .csv, each a list of values for the columns in PlayerHistory.COLUMNS (see the player_history.py module)
+    path: string
+        The snapshot file, defaults to SNAPSHOT_FILE in the config.py module
+
+    Returns
+    -------
+    integer
+        The size of the snapshot in bytes
+
+    Raises
+    ------
+    None
+    """
+
+    username_bytes = username.encode()
+    level_id_bytes = (level_id or "").encode()
+    stats_bytes = json.dumps(stats_rows, separators = (",", ":"), default = int).encode()
+    height, width = map_grid.shape
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, height, width, int(player[0]), int(player[1]), player_number_steps, min_number_steps, iteration, int(player_difficulty[-1:]), len(username_bytes), len(level_id_bytes), len(stats_bytes))
+    data = header + np.asarray(map_grid, dtype = np.uint8).tobytes() + username_bytes + level_id_bytes + stats_bytes
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+
+    with open(path + ".tmp", "wb") as snapshot_file:
+        snapshot_file.write(data)
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+
+    os.replace(path + ".tmp", path)
+
+    return len(data)
+
+def read_snapshot(username, path = SNAPSHOT_FILE):
+    """
+    Reads a snapshot through a memory map, so only the pages holding it are read from disk and nothing is parsed beyond the fixed header and the level array. Called by Game.__init__ in the main.py module; the level itself is resumed by Game.setup.
+
+    Parameters
+    ----------
+    username: string
+        The player's username, snapshots of other players are ignored
+    path: string
+        The snapshot file, defaults to SNAPSHOT_FILE in the config.py module
+
+    Returns
+    -------
+    dictionary or None
+        The values passed to write_snapshot, keyed by parameter name (with the level array copied out of the memory map, and level_id None if it was), None if there is no snapshot, it belongs to another player, does not match the level size in the config.py module, or is broken
+
+    Raises
+    ------
+    None
+    """
+
+    try:
+        with open(path, "rb") as snapshot_file, mmap.mmap(snapshot_file.fileno(), 0, access = mmap.ACCESS_READ) as data:
+            magic, version, height, width, player_y, player_x, player_number_steps, min_number_steps, iteration, difficulty, username_length, level_id_length, stats_length = HEADER.unpack_from(data)
+
+            if magic != MAGIC or version != FORMAT_VERSION or (height, width) != (TILES_HIGH, TILES_WIDE):
+                return None
+
+            offset = HEADER.size + height * width
+
+            if data[offset:offset + username_length].decode() != username:
+                return None
+
+            map_grid = np.frombuffer(data, dtype = np.uint8, count = height * width, offset = HEADER.size).reshape(height, width).astype(float)
+            offset = offset + username_length
+            level_id = data[offset:offset + level_id_length].decode() or None
+            offset = offset + level_id_length
+            stats_rows = json.loads(data[offset:offset + stats_length].decode())
+
+    except (OSError, ValueError, struct.error):
+        return None
+
+    return {
+        "username": username,
+        "map_grid": map_grid,
+        "player": (player_y, player_x),
+        "player_number_steps": player_number_steps,
+        "min_number_steps": min_number_steps,
+        "player_difficulty": f"Level {difficulty}",
+        "iteration": iteration,
+        "level_id": level_id,
+        "stats_rows": stats_rows
+    }
+
+def remove_snapshot(path = SNAPSHOT_FILE):
+    """
+    Removes the snapshot, if there is one, once a session has ended through the game over page. Called by Game.on_key_press in the main.py module.
+
+    Parameters
+    ----------
+    path: string
+        The snapshot file, defaults to SNAPSHOT_FILE in the config.py module
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    None
+    """
+
+    if os.path.exists(path):
+        os.remove(path)
\ No newline at end of file
@@ -0,0 +1,329 @@
+"""
+This file is a module for the game Automaze. It is a long-session soak test which plays thousands of levels in a row, either headlessly (the level generation, dedup, stats, history, and preview work done per level, without the Arcade library) or through the real Game in a hidden window, while tracking the memory traced by tracemalloc and the resident set size (RSS) of the process. It fails when memory grows by more than a budget per level and reports the allocation sites which grew the most. It is run on its own (python soak.py) and references the config.py, level_generator.py, density_controller.py, dedup.py, player_history.py, maze_features.py, and thumbnails.py modules, and the main.py module with --window.
+"""
+
+from config import *
+from level_generator import *
+from density_controller import DensityController
+from dedup import SeenLevels
+from player_history import PlayerHistory, SessionStats
+from maze_features import extract_features
+from thumbnails import render_level
+from bitboard import finish_boxes
+
+import argparse
+import gc
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from datetime import datetime as dt
+
+def current_rss():
+    """
+    Returns the resident set size of the process in bytes, from /proc on Linux and the peak resident set size elsewhere.
+    """
+
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        return peak if sys.platform == "darwin" else peak * 1024
+
+class HeadlessSession():
+    """
+    Stand-in for Game which does the per-level work of Game.setup and Game.on_key_release that does not need a window: generating and validating a level with generate_validated_level (the same loop as Game.generate_new_level, see the level_generator.py module), extracting features, recording the stats row in the session stats and the player history, and rendering the level finish preview. The difficulty setting cycles through all four tiers.
+    """
+
+    def __init__(self, directory, seed = 0):
+        """
+        Initializes class instance, with its player history, session stats, and density controller files in directory so the player_stats directory is left alone.
+
+        Parameters
+        ----------
+        directory: string
+            Directory for the soak test's player history, session stats, and density controller files
+        seed: integer
+            Seed for the random player performance
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        self.rng = random.Random(seed)
+        self.username = "soak"
+        self.iteration = 1
+        self.player_difficulty = "Level 1"
+        self.player_stats = SessionStats(os.path.join(directory, "player_stats.csv"))
+        self.player_history = PlayerHistory(os.path.join(directory, "player_history.sqlite"))
+        self.density_controller = DensityController(os.path.join(directory, "density_controller.json"))
+        self.seen_levels = SeenLevels()
+        self.level_cache = {}
+        self.preview = None
+
+    def play_level(self):
+        """
+        Generates one level and completes it.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        new_level = generate_validated_level(self.player_difficulty, self.density_controller, self.seen_levels, self.level_cache)
+        features = new_level.features if new_level.features is not None else extract_features(new_level.level_raw).iloc[0]
+
+        row = [dt.now().strftime("%Y-%m-%d %H:%M:%S"), self.username, self.iteration, self.player_difficulty, new_level.min_number_steps, new_level.min_number_steps + self.rng.randint(0, 6), "yes", new_level.level_id]
+        self.player_stats.record(row)
+        self.player_history.record(row)
+        self.player_history.record_features(new_level.level_id, features)
+        self.player_history.save_seen_levels(self.username, self.seen_levels)
+        self.preview = render_level(new_level.level_raw)
+
+        self.iteration = self.iteration + 1
+        self.player_difficulty = f"Level {self.iteration % 4 + 1}"
+
+    def close(self):
+        """
+        Saves the density controller and session stats and closes the player history.
+        """
+
+        self.density_controller.save()
+        self.player_stats.flush()
+        self.player_history.close()
+
+class WindowSession():
+    """
+    Drives the real Game (see the main.py module) in a hidden window: every level the player is put on the finish cell and Game.on_key_release runs the level completion (stats row, Game.setup with a new level room and sprite and the text and preview texture of the pages updated), and both the level finish page and the new level are drawn once. The game is given player history, session stats, density controller, and snapshot files in the soak test's directory, so it starts from a fresh player at Level 1 and never reads or writes the player_stats directory.
+    """
+
+    def __init__(self, directory, seed = 0):
+        """
+        Initializes class instance and opens the hidden window.
+
+        Parameters
+        ----------
+        directory: string
+            Directory for the soak test's player history, session stats, and density controller files
+        seed: integer
+            Seed for the random player performance
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ImportError
+            Raised when the Arcade library is not installed
+        """
+
+        from main import Game
+
+        self.rng = random.Random(seed)
+        self.game = Game(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE, visible = False, username = "soak", player_history_file = os.path.join(directory, "player_history.sqlite"), snapshot_file = os.path.join(directory, "snapshot.bin"), density_controller_file = os.path.join(directory, "density_controller.json"), player_stats_file = os.path.join(directory, "player_stats.csv"))
+        self.game.setup()
+        self.game.current_room = 1
+
+    def play_level(self):
+        """
+        Completes the current level and draws the following pages.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        None
+        """
+
+        game = self.game
+        # pyglet's event loop makes the window's context current before every frame, which is when it deletes the GL buffers of released sprites and text
+        game.switch_to()
+        finish_y, finish_x = np.argwhere(game.map_grid == 3)[0]
+
+        game.new_y_coordinates = finish_y
+        game.new_x_coordinates = finish_x
+        game.player_number_steps = game.min_number_steps + self.rng.randint(0, 6)
+        game.on_key_release(None, None)
+
+        for room in [2, 1]:
+            game.current_room = room
+            game.on_draw()
+            game.flip()
+
+    def close(self):
+        """
+        Closes the hidden window, which writes the player history.
+        """
+
+        self.game.on_close()
+
+def warm_caches(width = TILES_WIDE, height = TILES_HIGH):
+    """
+    Fills the bounded caches of the level pipeline to the size they reach in a long session, the search boxes of every finish cell (see finish_boxes in the bitboard.py module) and the tile atlas of the thumbnails.py module, so their growth is not counted as growth per level however short the run.
+
+    Parameters
+    ----------
+    width: integer
+        The width of the level array, defaults to TILES_WIDE in the config.py module
+    height: integer
+        The height of the level array, defaults to TILES_HIGH in the config.py module
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    None
+    """
+
+    for finish_y in range(height):
+        for finish_x in range(width):
+            finish_boxes(width, height, finish_y, finish_x)
+
+    render_level(np.ones((height, width)))
+
+def soak(session, number_levels = SOAK_LEVELS, warmup_levels = SOAK_WARMUP_LEVELS, report_every = 500):
+    """
+    Plays number_levels levels after warmup_levels levels which fill the caches (e.g. the tile atlas and search boxes) and measures how much traced memory and RSS grew per level between the end of the warmup and the end of the run. The memory tracemalloc uses for its own bookkeeping is left out of the RSS.
+
+    Parameters
+    ----------
+    session: object
+        HeadlessSession or WindowSession instance
+    number_levels: integer
+        The number of levels measured
+    warmup_levels: integer
+        The number of levels played before measuring
+    report_every: integer
+        The number of levels between progress lines
+
+    Returns
+    -------
+    traced_per_level: float
+        Growth of the memory traced by tracemalloc in bytes per level
+    rss_per_level: float
+        Growth of the RSS in bytes per level
+    growth: list
+        tracemalloc.StatisticDiff of the allocation sites, largest growth first
+
+    Raises
+    ------
+    None
+    """
+
+    tracemalloc.start(SOAK_TRACEBACK_FRAMES)
+    warm_caches()
+
+    # warmup and measured levels are played from the same line, so live objects of the last warmup level and of the last measured level have the same traceback
+    for i in range(-warmup_levels, number_levels + 1):
+        if i == 0:
+            gc.collect()
+            baseline = tracemalloc.take_snapshot()
+            traced_before = tracemalloc.get_traced_memory()[0]
+            rss_before = current_rss() - tracemalloc.get_tracemalloc_memory()
+            started = time.perf_counter()
+
+            continue
+
+        session.play_level()
+
+        if i > 0 and i % report_every == 0:
+            print(f"{i:>7} levels: traced {(tracemalloc.get_traced_memory()[0] - traced_before) / 1024:10.1f} KiB, RSS {(current_rss() - tracemalloc.get_tracemalloc_memory() - rss_before) / 1024:10.1f} KiB, {i / (time.perf_counter() - started):.1f} levels/s")
+
+    # totals are read before the comparison, whose statistics are traced too
+    gc.collect()
+    traced_per_level = (tracemalloc.get_traced_memory()[0] - traced_before) / number_levels
+    rss_per_level = (current_rss() - tracemalloc.get_tracemalloc_memory() - rss_before) / number_levels
+    growth = [statistic for statistic in tracemalloc.take_snapshot().compare_to(baseline, "traceback") if statistic.size_diff > 0]
+
+    tracemalloc.stop()
+
+    return traced_per_level, rss_per_level, growth
+
+def main():
+    """
+    Command line entry point: runs the soak test and exits with status 1 if memory grew by more than the budget per level (SOAK_BUDGET_PER_LEVEL and SOAK_RSS_BUDGET_PER_LEVEL in the config.py module), printing the allocation sites which grew the most.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    SystemExit
+        Raised with status 1 when memory per level is over budget, and with status 2 when fewer than SOAK_MIN_LEVELS levels or SOAK_MIN_WARMUP_LEVELS warmup levels are asked for (SOAK_MIN_WINDOW_LEVELS and SOAK_MIN_WINDOW_WARMUP_LEVELS with --window)
+    """
+
+    parser = argparse.ArgumentParser(description = "Long-session memory soak test of Automaze.")
+    parser.add_argument("--levels", type = int, default = SOAK_LEVELS, help = "number of levels measured")
+    parser.add_argument("--warmup", type = int, default = SOAK_WARMUP_LEVELS, help = "number of levels played before measuring")
+    parser.add_argument("--budget", type = float, default = SOAK_BUDGET_PER_LEVEL, help = "traced memory growth allowed per level in bytes")
+    parser.add_argument("--rss-budget", type = float, default = SOAK_RSS_BUDGET_PER_LEVEL, help = "RSS growth allowed per level in bytes")
+    parser.add_argument("--sites", type = int, default = 10, help = "number of allocation sites reported")
+    parser.add_argument("--seed", type = int, default = 0, help = "seed for the random player performance")
+    parser.add_argument("--window", action = "store_true", help = "play through the real game in a hidden window (needs the Arcade library)")
+    args = parser.parse_args()
+
+    # shorter runs are dominated by the memory of single levels rather than growth per level, and in a window by the GL buffers pyglet grows over the first levels
+    min_levels, min_warmup_levels = (SOAK_MIN_WINDOW_LEVELS, SOAK_MIN_WINDOW_WARMUP_LEVELS) if args.window else (SOAK_MIN_LEVELS, SOAK_MIN_WARMUP_LEVELS)
+
+    if args.levels < min_levels or args.warmup < min_warmup_levels:
+        parser.error(f"the budgets per level are only valid for at least {min_levels} levels after at least {min_warmup_levels} warmup levels{' with --window' if args.window else ''}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        session = WindowSession(directory, args.seed) if args.window else HeadlessSession(directory, args.seed)
+
+        try:
+            traced_per_level, rss_per_level, growth = soak(session, args.levels, args.warmup)
+
+        finally:
+            session.close()
+
+    over_budget = traced_per_level > args.budget or rss_per_level > args.rss_budget
+
+    print(f"{'window' if args.window else 'headless'}, {args.levels} levels: traced {traced_per_level:.0f} B/level (budget {args.budget:.0f}), RSS {rss_per_level:.0f} B/level (budget {args.rss_budget:.0f}){', OVER BUDGET' if over_budget else ''}")
+    print(f"top {args.sites} allocation sites by growth:")
+
+    for statistic in growth[:args.sites]:
+        print(f"{statistic.size_diff / 1024:+10.1f} KiB {statistic.count_diff:+8d} blocks")
+
+        for line in statistic.traceback.format(limit = SOAK_TRACEBACK_FRAMES, most_recent_first = True):
+            print(f"        {line}")
+
+    if over_budget:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
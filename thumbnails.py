@@ -0,0 +1,214 @@
+"""
+This file is a module for the game Automaze. It renders level arrays to images without opening a game window, using the same tiles as the game (sliced from img/background.png) and numpy fancy indexing so a whole batch of levels is rendered without drawing tile by tile. It can be run on its own to render thumbnails for a corpus of levels with a pool of worker processes, and is imported into the Automaze main.py module for the preview on the level finish page. It references the config.py and level_generator.py modules.
+"""
+
+from config import *
+from level_generator import *
+
+import argparse
+import glob
+import os
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from multiprocessing import Pool
+from PIL import Image
+
+@lru_cache(maxsize = None)
+def load_tile_atlas(tile_size = THUMBNAIL_TILE_SIZE):
+    """
+    Slices the open, wall, and finish tiles from img/background.png (the same regions setup_level in the main.py module loads as textures), scales them to tile_size, and stacks them so that indexing the atlas with a cell code returns the tile for that code. Cached, so the image is only read once per tile size and process.
+
+    Parameters
+    ----------
+    tile_size: integer
+        The width and height of a tile in the rendered image in pixels, defaults to THUMBNAIL_TILE_SIZE in the config.py module
+
+    Returns
+    -------
+    atlas: array
+        4D numpy array of shape (4, tile_size, tile_size, 3) and type uint8; atlas[0] and atlas[2] are the open tile (start cells are drawn as open cells, as in the game), atlas[1] the wall tile, and atlas[3] the finish tile
+
+    Raises
+    ------
+    FileNotFoundError
+        Raised when img/background.png cannot be found
+    """
+
+    background = Image.open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "img", "background.png")).convert("RGB")
+
+    tiles = []
+
+    for x, y in [(0, 0), (50, 0), (0, 0), (0, 50)]:
+        tile = background.crop((x, y, x + 50, y + 50)).resize((tile_size, tile_size), Image.BILINEAR)
+        tiles.append(np.asarray(tile))
+
+    return np.stack(tiles)
+
+def render_levels(levels, tile_size = THUMBNAIL_TILE_SIZE):
+    """
+    Renders a batch of level arrays of the same size to RGB images in one fancy-indexing operation: the atlas is indexed with the whole batch of cell codes at once and the resulting tiles are rearranged into images.
+
+    Parameters
+    ----------
+    levels: array
+        3D numpy array of shape (number of levels, height, width) containing coded cells (see level_generator.py module for codes), or a list of 2D level arrays of the same size
+    tile_size: integer
+        The width and height of a tile in pixels, defaults to THUMBNAIL_TILE_SIZE in the config.py module
+
+    Returns
+    -------
+    images: array
+        4D numpy array of shape (number of levels, height * tile_size, width * tile_size, 3) and type uint8
+
+    Raises
+    ------
+    IndexError
+        Raised when a level contains codes other than 0 to 3, e.g. a level on which find_path has marked cells
+    """
+
+    levels = np.asarray(levels).astype(np.intp)
+    number_levels, height, width = levels.shape
+
+    tiles = load_tile_atlas(tile_size)[levels]
+
+    return tiles.transpose(0, 1, 3, 2, 4, 5).reshape(number_levels, height * tile_size, width * tile_size, 3)
+
+def render_level(level, tile_size = THUMBNAIL_TILE_SIZE):
+    """
+    Renders a single level array to an RGB image (see render_levels). Called by setup_finish_level in the main.py module.
+
+    Parameters
+    ----------
+    level: array
+        2D numpy array containing coded cells
+    tile_size: integer
+        The width and height of a tile in pixels, defaults to THUMBNAIL_TILE_SIZE in the config.py module
+
+    Returns
+    -------
+    image: array
+        3D numpy array of shape (height * tile_size, width * tile_size, 3) and type uint8
+
+    Raises
+    ------
+    None
+    """
+
+    return render_levels(np.asarray(level)[np.newaxis], tile_size)[0]
+
+def render_level_ids(level_ids, out_dir, tile_size = THUMBNAIL_TILE_SIZE):
+    """
+    Rebuilds a batch of levels from their level IDs, renders them together, and saves one .png per level named after its level ID. Level IDs are passed to worker processes instead of level arrays as they are much more compact. Called by render_corpus in each worker process.
+
+    Parameters
+    ----------
+    level_ids: list
+        Level IDs (see LevelGenerator.from_level_id in the level_generator.py module), all of the same grid size
+    out_dir: string
+        The directory the .png files are saved to
+    tile_size: integer
+        The width and height of a tile in pixels
+
+    Returns
+    -------
+    integer
+        The number of thumbnails saved
+
+    Raises
+    ------
+    ValueError
+        Raised when a level ID is malformed or was created with a different generator version
+    """
+
+    levels = [LevelGenerator.from_level_id(level_id).level_raw for level_id in level_ids]
+    images = render_levels(levels, tile_size)
+
+    for level_id, image in zip(level_ids, images):
+        Image.fromarray(image).save(os.path.join(out_dir, f"{level_id}.png"), compress_level = 1)
+
+    return len(level_ids)
+
+def render_corpus(level_ids, out_dir, processes = None, batch_size = THUMBNAIL_BATCH_SIZE, tile_size = THUMBNAIL_TILE_SIZE):
+    """
+    Renders thumbnails for a corpus of levels with a pool of worker processes, each of which renders batch_size levels at a time with render_level_ids.
+
+    Parameters
+    ----------
+    level_ids: list
+        Level IDs (see LevelGenerator.from_level_id in the level_generator.py module); levels of different grid sizes are batched separately
+    out_dir: string
+        The directory the .png files are saved to, created if it does not exist
+    processes: integer
+        Optional, the number of worker processes, defaults to the number of CPUs
+    batch_size: integer
+        The number of levels each worker renders at a time, defaults to THUMBNAIL_BATCH_SIZE in the config.py module
+    tile_size: integer
+        The width and height of a tile in pixels, defaults to THUMBNAIL_TILE_SIZE in the config.py module
+
+    Returns
+    -------
+    integer
+        The number of thumbnails saved
+
+    Raises
+    ------
+    None
+    """
+
+    os.makedirs(out_dir, exist_ok = True)
+
+    by_size = {}
+
+    for level_id in dict.fromkeys(level_ids):
+        by_size.setdefault(decode_level_id(level_id)[1:3], []).append(level_id)
+
+    batches = [(same_size[i:i + batch_size], out_dir, tile_size) for same_size in by_size.values() for i in range(0, len(same_size), batch_size)]
+
+    with Pool(processes) as pool:
+        return sum(pool.starmap(render_level_ids, batches))
+
+def main():
+    """
+    Command line entry point: renders thumbnails for the level IDs recorded in player stats .csv files and/or for randomly generated levels.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    None
+    """
+
+    parser = argparse.ArgumentParser(description = "Render Automaze level thumbnails without opening a game window.")
+    parser.add_argument("out_dir", help = "directory the .png thumbnails are saved to")
+    parser.add_argument("--stats", nargs = "*", default = [], help = "player stats .csv files to read level IDs from (default: none)")
+    parser.add_argument("--random", type = int, default = 0, help = "number of random levels to render in addition")
+    parser.add_argument("--processes", type = int, default = None, help = "number of worker processes (default: number of CPUs)")
+    parser.add_argument("--tile-size", type = int, default = THUMBNAIL_TILE_SIZE, help = "tile size in pixels")
+    args = parser.parse_args()
+
+    level_ids = []
+
+    for path in args.stats:
+        for stats_file in glob.glob(path):
+            stats = pd.read_csv(stats_file)
+
+            if "level_id" in stats.columns:
+                level_ids.extend(stats["level_id"].dropna())
+
+    new_level = LevelGenerator(TILES_WIDE, TILES_HIGH)
+
+    for i in range(args.random):
+        new_level.generate_level()
+        level_ids.append(new_level.level_id)
+
+    print(f"{render_corpus(level_ids, args.out_dir, args.processes, tile_size = args.tile_size)} thumbnails saved to {args.out_dir}")
+
+if __name__ == "__main__":
+    main()